@@ -0,0 +1,46 @@
+
+import sys
+import time
+import argparse
+
+from synthetic import load_module, generate
+
+
+def run(args):
+    module = load_module()
+    config = module.ExtConfig({
+        'structure': {'schema': 'public', 'table': '.*'},
+        'diagram': {'addColumnComment': True}
+    })
+
+    sys.stdout.write(f"{'tables':>8} {'columns':>9} {'constraints':>12} {'seconds':>9} {'us/row':>8}\n")
+
+    for tables in args.sizes:
+        column_rows, constraint_rows = generate(tables, args.columns, args.fk_density, args.chain_depth)
+
+        start = time.perf_counter()
+        structure = module.DBStructure(config)
+        for row in column_rows:
+            structure.add_table_entry(row)
+        for row in constraint_rows:
+            structure.add_constraint(row)
+        # older versions link tables per constraint row
+        if hasattr(structure, 'build_graph'):
+            structure.build_graph()
+        elapsed = time.perf_counter() - start
+
+        rows = len(column_rows) + len(constraint_rows)
+        sys.stdout.write(f'{tables:>8} {len(column_rows):>9} {len(constraint_rows):>12} {elapsed:>9.3f} {elapsed / rows * 1000000:>8.2f}\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure DBStructure ingestion time for growing catalogs')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[500, 1000, 2000, 4000, 8000], help='Table counts')
+    parser.add_argument('--columns', type=int, default=20, help='Columns per table')
+    parser.add_argument('--fk-density', type=float, default=1.0, help='Additional foreign keys per table (average)')
+    parser.add_argument('--chain-depth', type=int, default=1, help='Length of foreign key chains (1: only random foreign keys)')
+    run(parser.parse_args())
+
+
+if __name__ == '__main__':
+    main()
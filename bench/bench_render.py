@@ -0,0 +1,65 @@
+
+import sys
+import time
+import argparse
+
+from synthetic import default_module, load_module
+
+
+def run(args):
+    module = load_module(args.module)
+    config = module.ExtConfig({
+        'structure': {'schema': 'public', 'table': '.*'},
+        'diagram': {
+            'addColumnComment': args.comments,
+            'appendColumnType': True,
+            'groupTableWithComment': True,
+            'prependSchemaName': True
+        }
+    })
+
+    structure = module.DBStructure(config)
+    tables = (args.cells + args.columns - 1) // args.columns
+    for t in range(tables):
+        for c in range(args.columns):
+            structure.add_table_entry({
+                'table_schema': 'public',
+                'table_name': f'table_{t}',
+                'column_name': f'column_{c}',
+                'udt_name': 'int4',
+                'ordinal_position': c + 1,
+                'description': 'description'
+            })
+
+        structure.add_constraint({
+            'constraint_type': 'PRIMARY KEY',
+            'table_schema': 'public',
+            'constraint_name': f'table_{t}_pkey',
+            'table_name': f'table_{t}',
+            'column_name': 'column_0',
+            'foreign_table_schema': 'public',
+            'foreign_table_name': f'table_{t}',
+            'foreign_column_name': 'column_0'
+        })
+
+    size = 0
+    start = time.perf_counter()
+    for table in structure.tables:
+        size = size + len(str(table))
+    elapsed = time.perf_counter() - start
+
+    cells = tables * args.columns
+    sys.stdout.write(f'{cells} cells in {tables} tables: {elapsed:.3f} s, {elapsed / cells * 1000000000:.0f} ns/cell, {size} bytes\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure table/cell rendering time')
+    parser.add_argument('--module', default=default_module, help='Path to single file db-diagram.py of an older version (default: db_diagram package)')
+    parser.add_argument('--cells', type=int, default=1000000, help='Number of column cells')
+    parser.add_argument('--columns', type=int, default=20, help='Columns per table')
+    parser.add_argument('--comments', action='store_true', default=False, help='Render column comments')
+    run(parser.parse_args())
+
+
+if __name__ == '__main__':
+    main()
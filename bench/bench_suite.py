@@ -0,0 +1,186 @@
+import sys
+import json
+import time
+import argparse
+import platform
+import tracemalloc
+
+from synthetic import default_module, load_module, generate
+
+
+phases = ['ingest', 'layout', 'render']
+
+
+class NullStream:
+    def __init__(self):
+        self.size = 0
+
+    def write(self, data):
+        self.size = self.size + len(data)
+
+
+def get_config(module, args):
+    return module.ExtConfig({
+        'structure': {'schema': 'public', 'table': '.*'},
+        'diagram': {
+            'addColumnComment': True,
+            'appendColumnType': True,
+            'layout': args.layout,
+            'splitComponents': args.split_components
+        }
+    })
+
+
+def run_phases(module, args, column_rows, constraint_rows, memory):
+    timings = {}
+    peaks = {}
+    stream = NullStream()
+
+    def measure(phase, start):
+        timings[phase] = time.perf_counter() - start
+        if memory:
+            current, peaks[phase] = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            if phase == 'ingest':
+                # memory held by the model itself (tables, columns, edges)
+                peaks['model'] = current
+
+    if memory:
+        tracemalloc.start()
+
+    start = time.perf_counter()
+    structure = module.DBStructure(get_config(module, args))
+    for row in column_rows:
+        structure.add_table_entry(row)
+    for row in constraint_rows:
+        structure.add_constraint(row)
+    # older versions link tables per constraint row
+    if hasattr(structure, 'build_graph'):
+        structure.build_graph()
+    measure('ingest', start)
+
+    start = time.perf_counter()
+    placed = structure.place_tables()
+    measure('layout', start)
+
+    start = time.perf_counter()
+    diagram = module.DiagramWriter(stream)
+    structure.render_diagram(diagram, placed)
+    measure('render', start)
+
+    if memory:
+        tracemalloc.stop()
+
+    return timings, peaks, stream.size
+
+
+def run(args):
+    module = load_module(args.module)
+    results = {}
+
+    sys.stdout.write(f"{'tables':>8} {'columns':>9} {'fks':>8} {'ingest s':>9} {'layout s':>9} {'render s':>9} {'peak MB':>8} {'B/col':>7} {'output MB':>10}\n")
+
+    for tables in args.sizes:
+        isolated = int(tables * args.isolated)
+        column_rows, constraint_rows = generate(tables, args.columns, args.fk_density, args.chain_depth, isolated)
+        fks = sum(1 for row in constraint_rows if row[0] == 'FOREIGN KEY')
+
+        timings = {}
+        for repeat in range(max(1, args.repeat)):
+            current, peaks, size = run_phases(module, args, column_rows, constraint_rows, False)
+            for phase in phases:
+                timings[phase] = min(timings.get(phase, current[phase]), current[phase])
+
+        # tracemalloc slows allocation down, so memory is measured in a separate pass
+        peak = 0
+        model = 0
+        if not args.no_memory:
+            peaks = run_phases(module, args, column_rows, constraint_rows, True)[1]
+            model = peaks.pop('model')
+            peak = max(peaks.values())
+
+        results[str(tables)] = dict(timings, peak_memory=peak, model_memory=model, tables=tables, columns=len(column_rows), foreign_keys=fks, output_bytes=size)
+        sys.stdout.write(f"{tables:>8} {len(column_rows):>9} {fks:>8} {timings['ingest']:>9.3f} {timings['layout']:>9.3f} {timings['render']:>9.3f} {peak / 1048576:>8.1f} {model / len(column_rows):>7.0f} {size / 1048576:>10.1f}\n")
+
+    return {
+        'python': platform.python_version(),
+        'params': {
+            'columns': args.columns,
+            'fk_density': args.fk_density,
+            'chain_depth': args.chain_depth,
+            'isolated': args.isolated,
+            'layout': args.layout,
+            'split_components': args.split_components
+        },
+        'results': results
+    }
+
+
+def compare(report, baseline, args):
+    regressions = 0
+    if baseline['params'] != report['params']:
+        sys.stdout.write('WARNING: baseline was measured with different parameters\n')
+
+    sys.stdout.write(f"\n{'tables':>8} {'metric':>12} {'baseline':>10} {'current':>10} {'ratio':>7}\n")
+    for tables, result in report['results'].items():
+        if tables not in baseline['results']:
+            continue
+
+        for metric in phases + ['peak_memory', 'model_memory']:
+            before = baseline['results'][tables].get(metric)
+            after = result.get(metric)
+            if not before or not after:
+                continue
+
+            # too short to be compared reliably
+            if metric in phases and before < args.min_time:
+                continue
+
+            ratio = after / before
+            flag = ''
+            if ratio > 1 + args.tolerance:
+                flag = ' REGRESSION'
+                regressions = regressions + 1
+
+            sys.stdout.write(f'{tables:>8} {metric:>12} {before:>10.4g} {after:>10.4g} {ratio:>7.2f}{flag}\n')
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time ingestion, layout and rendering on synthetic catalogs')
+    parser.add_argument('--module', default=default_module, help='Path to single file db-diagram.py of an older version (default: db_diagram package)')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000, 50000], help='Table counts')
+    parser.add_argument('--columns', type=int, default=10, help='Columns per table')
+    parser.add_argument('--fk-density', type=float, default=1.0, help='Additional foreign keys per table (average)')
+    parser.add_argument('--chain-depth', type=int, default=5, help='Length of foreign key chains')
+    parser.add_argument('--isolated', type=float, default=0.1, help='Share of tables without foreign keys')
+    parser.add_argument('--layout', default='columns', help='Layout engine (columns or layered)')
+    parser.add_argument('--split-components', action='store_true', default=False, help='Lay out FK components separately')
+    parser.add_argument('--repeat', type=int, default=3, help='Timing runs per size (the fastest one is reported)')
+    parser.add_argument('--no-memory', action='store_true', default=False, help='Skip the peak memory pass')
+    parser.add_argument('--save', help='Write results into JSON file (e.g. new baseline)')
+    parser.add_argument('--baseline', help='Compare results with JSON file written by --save')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed slowdown against baseline (0.25 = 25 %%)')
+    parser.add_argument('--min-time', type=float, default=0.01, help='Phases faster than this in the baseline are not compared (seconds)')
+    args = parser.parse_args()
+
+    report = run(args)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+            f.write('\n')
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+        regressions = compare(report, baseline, args)
+        if regressions:
+            sys.stdout.write(f'{regressions} regressions\n')
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
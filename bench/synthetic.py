@@ -0,0 +1,62 @@
+import os
+import sys
+import random
+import importlib.util
+
+
+root = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+default_module = None
+
+
+def load_module(path=default_module):
+    # the db_diagram package of this checkout, or a single file db-diagram.py of an older version
+    if not path:
+        sys.path.insert(0, root)
+        import db_diagram
+        return db_diagram
+
+    # registered in sys.modules so layout workers can pickle module level functions
+    spec = importlib.util.spec_from_file_location('db_diagram', path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules['db_diagram'] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+# Rows are tuples in the order accepted by add_table_entry/add_constraint.
+# Connected tables form chains of chain_depth tables (every table references its
+# predecessor in the chain), fk_density adds on average that many foreign keys per
+# table to random earlier tables, the last `isolated` tables have no foreign keys.
+def generate(tables, columns=10, fk_density=1.0, chain_depth=5, isolated=0, schema='public', seed=1):
+    rnd = random.Random(seed)
+    columns = max(2, columns)
+    chain_depth = max(1, chain_depth)
+    connected = max(0, tables - isolated)
+    column_rows = []
+    constraint_rows = []
+
+    for t in range(tables):
+        table_name = f'table_{t}'
+        for c in range(columns):
+            column_rows.append((schema, table_name, f'column_{c}', 'int8' if c == 0 else 'int4', c + 1, None))
+
+        constraint_rows.append(('PRIMARY KEY', schema, f'{table_name}_pkey', table_name, 'column_0', schema, table_name, 'column_0'))
+
+        if t >= connected:
+            continue
+
+        targets = []
+        if t % chain_depth:
+            targets.append(t - 1)
+
+        extra = int(fk_density)
+        if rnd.random() < fk_density - extra:
+            extra = extra + 1
+
+        if t:
+            targets.extend(rnd.randrange(t) for x in range(extra))
+
+        for fk, target in enumerate(targets[:columns - 1]):
+            constraint_rows.append(('FOREIGN KEY', schema, f'{table_name}_fkey_{fk}', table_name, f'column_{fk + 1}', schema, f'table_{target}', 'column_0'))
+
+    return column_rows, constraint_rows
@@ -0,0 +1,16 @@
+from .api import introspect, build_model, place, render, generate, write_diagram
+from .config import DiagramError, ExtConfig, load_config, dump_config
+from .layers import dbLayer, pgLayer, sqliteLayer, snapshotLayer, pgDumpLayer, layer_types, get_layer
+from .snapshot import read_snapshot, write_snapshot
+from .structure import DBStructure
+from .writer import DiagramWriter, CompressedDiagramWriter, PreviousDiagram
+
+
+__all__ = [
+    'introspect', 'build_model', 'place', 'render', 'generate', 'write_diagram',
+    'DiagramError', 'ExtConfig', 'load_config', 'dump_config',
+    'dbLayer', 'pgLayer', 'sqliteLayer', 'snapshotLayer', 'pgDumpLayer', 'layer_types', 'get_layer',
+    'read_snapshot', 'write_snapshot',
+    'DBStructure',
+    'DiagramWriter', 'CompressedDiagramWriter', 'PreviousDiagram'
+]
@@ -0,0 +1,120 @@
+import io
+import threading
+
+from .config import DiagramError, ExtConfig
+from .layers import get_layer
+from .structure import DBStructure
+from .writer import DiagramWriter, CompressedDiagramWriter, PreviousDiagram
+
+
+# Steps of a diagram run, each one usable on its own:
+#   snapshot = introspect(config)          catalog rows as plain tuples (picklable, see write_snapshot)
+#   model = build_model(config, snapshot)  tables, columns and foreign keys
+#   placed = place(model)                  positions of tables (or pages)
+#   render(model, placed, stream)          draw.io XML
+
+
+def introspect(config, timeout=None):
+    layer = get_layer(config)
+
+    # once the time is up the running query is canceled and reading stops
+    timer = threading.Timer(timeout, layer.cancel) if timeout else None
+    try:
+        if not layer.is_connected():
+            raise DiagramError('Connection failed')
+
+        if timer:
+            timer.start()
+
+        return layer.get_snapshot()
+    except Exception:
+        if layer.is_cancelled():
+            raise DiagramError(f'Time limit of {timeout} s exceeded while reading the catalog')
+
+        raise
+    finally:
+        if timer:
+            timer.cancel()
+
+        layer.close()
+
+
+def build_model(config, snapshot, previous=None):
+    model = DBStructure(config if isinstance(config, ExtConfig) else ExtConfig(config))
+    for entry in snapshot['columns']:
+        model.add_table_entry(entry)
+
+    for entry in snapshot['constraints']:
+        model.add_constraint(entry)
+
+    model.build_graph()
+
+    # path of an existing diagram, positions of unchanged tables are kept
+    if previous:
+        model.set_previous_diagram(PreviousDiagram().load(previous))
+
+    return model
+
+
+def place(model):
+    if model.page_mode:
+        model.set_pages()
+        return model.page_list
+
+    return model.place_tables()
+
+
+def render(model, placed, stream, compressed=False):
+    if model.page_mode:
+        model.render_pages(stream, compressed)
+        return
+
+    if compressed:
+        diagram = CompressedDiagramWriter(stream)
+    else:
+        diagram = DiagramWriter(stream)
+
+    model.render_diagram(diagram, placed)
+    diagram.close()
+
+
+def generate(config, stream=None, compressed=None):
+    # rows go from the database straight into the model, without a snapshot in between
+    if compressed is None:
+        compressed = bool(ExtConfig(config).get('diagram', 'compressed', False))
+
+    layer = get_layer(config)
+    try:
+        layer.get_table_structure()
+        layer.get_constraints()
+    finally:
+        layer.close()
+
+    model = layer.get_model()
+    if stream is not None:
+        render(model, place(model), stream, compressed)
+        return None
+
+    stream = io.StringIO()
+    render(model, place(model), stream, compressed)
+    return stream.getvalue()
+
+
+def write_diagram(layer, stream, compressed, stats):
+    if layer.get_pages():
+        with stats.measure('pages', True):
+            layer.write_pages(stream, compressed)
+
+        return
+
+    with stats.measure('layout', True):
+        placed = layer.place_tables()
+
+    with stats.measure('render', True):
+        if compressed:
+            diagram = CompressedDiagramWriter(stream)
+        else:
+            diagram = DiagramWriter(stream)
+
+        layer.render_diagram(diagram, placed)
+        diagram.close()
@@ -0,0 +1,135 @@
+import sys
+import copy
+import time
+import signal
+import collections
+import concurrent.futures
+
+from .api import introspect, build_model, place, render
+from .config import DiagramError, ExtConfig
+from .writer import atomic_output
+
+
+def get_batch_configs(config):
+    configs = []
+    names = set()
+    for i, entry in enumerate(config.get('databases') or []):
+        entry = dict(entry or {})
+        database_config = copy.deepcopy({key: value for key, value in config.items() if key not in ['databases', 'batch', 'server']})
+
+        database = dict(database_config.get('database') or {})
+        for key, value in entry.items():
+            if key in ['structure', 'diagram']:
+                section = dict(database_config.get(key) or {})
+                section.update(value or {})
+                database_config[key] = section
+
+            elif key not in ['name', 'output']:
+                database[key] = value
+
+        database_config['database'] = database
+
+        name = str(entry.get('name', f'database_{i + 1}'))
+        if name in names:
+            raise DiagramError(f'Duplicate database name "{name}" in databases list')
+
+        names.add(name)
+        configs.append((name, entry.get('output'), database_config))
+
+    return configs
+
+
+def raise_timeout(signum, frame):
+    raise DiagramError('Time limit exceeded while rendering')
+
+
+def introspect_database(config, timeout):
+    start = time.time()
+    snapshot = introspect(config, timeout)
+    return snapshot, time.time() - start
+
+
+def render_database(config, snapshot, output, compressed, timeout=None):
+    # runs in the main thread of a worker process, so an alarm can interrupt it
+    alarm = bool(timeout) and hasattr(signal, 'setitimer')
+    if alarm:
+        signal.signal(signal.SIGALRM, raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+
+    try:
+        model = build_model(config, snapshot)
+
+        with atomic_output(output) as f:
+            render(model, place(model), f, compressed)
+
+        return len(model.tables)
+    finally:
+        if alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+def run_batch(args, config):
+    batch = ExtConfig(config)
+    workers = int(batch.get('batch', 'workers', 4))
+    render_workers = int(batch.get('batch', 'renderWorkers', 0))
+    timeout = batch.get('batch', 'timeout', None)
+    time_limit = float(timeout) if timeout else None
+
+    results = collections.OrderedDict()
+    introspections = {}
+    renders = {}
+
+    # introspection is I/O bound (threads), rendering is CPU bound (processes)
+    with concurrent.futures.ThreadPoolExecutor(max(1, workers)) as introspect_executor, \
+            concurrent.futures.ProcessPoolExecutor(render_workers or None) as render_executor:
+
+        for name, output, database_config in get_batch_configs(config):
+            results[name] = {'status': 'FAILED', 'tables': 0, 'seconds': 0, 'error': ''}
+            if not output:
+                results[name]['error'] = 'Missing "output" key'
+                continue
+
+            if timeout and not 'timeout' in database_config['database']:
+                database_config['database']['timeout'] = timeout
+
+            compressed = args.compress or bool(ExtConfig(database_config).get('diagram', 'compressed', False))
+            future = introspect_executor.submit(introspect_database, database_config, time_limit)
+            introspections[future] = (name, output, database_config, compressed, time.time())
+
+        for future in concurrent.futures.as_completed(introspections):
+            name, output, database_config, compressed, start = introspections[future]
+            try:
+                snapshot, seconds = future.result()
+            except Exception as e:
+                results[name].update(error=str(e).strip(), seconds=time.time() - start)
+                continue
+
+            # the time limit covers reading and rendering of a database together
+            render_limit = None
+            if time_limit:
+                render_limit = time_limit - seconds
+                if render_limit <= 0:
+                    results[name].update(error=f'Time limit of {time_limit} s exceeded', seconds=time.time() - start)
+                    continue
+
+            renders[render_executor.submit(render_database, database_config, snapshot, output, compressed, render_limit)] = (name, start)
+
+        for future in concurrent.futures.as_completed(renders):
+            name, start = renders[future]
+            try:
+                results[name].update(status='OK', tables=future.result())
+            except Exception as e:
+                results[name]['error'] = str(e).strip()
+
+            results[name]['seconds'] = time.time() - start
+
+    failed = 0
+    for name, result in results.items():
+        if result['status'] != 'OK':
+            failed = failed + 1
+
+        sys.stdout.write(f"{result['status']:<7} {name:<30} {result['tables']:>7} tables {result['seconds']:>8.2f} s {result['error']}\n")
+
+    sys.stdout.write(f'{len(results) - failed} of {len(results)} databases done\n')
+    if failed:
+        raise DiagramError(f'{failed} of {len(results)} databases failed')
@@ -0,0 +1,218 @@
+import os
+import sys
+import time
+import argparse
+import traceback
+
+from .api import write_diagram
+from .config import DiagramError, ExtConfig, load_config, dump_config
+from .layers import get_layer
+from .snapshot import DescriptionStore, write_snapshot
+from .stats import RunStats
+from .writer import PreviousDiagram, atomic_output
+
+
+def run(args):
+    if not args.config:
+        raise DiagramError('Missing config file')
+
+    config = load_config(args.config)
+
+    if args.serve is not None:
+        from .server import serve
+        serve(args, config)
+        return
+
+    if 'databases' in config:
+        from .batch import run_batch
+        run_batch(args, config)
+        return
+
+    structure = config.setdefault('structure', {}) or {}
+    config['structure'] = structure
+    if args.focus:
+        structure['focus'] = args.focus
+
+    if args.depth is not None:
+        structure['focusDepth'] = args.depth
+
+    if args.direction:
+        structure['focusDirection'] = args.direction
+
+    if not str(structure.get('focusDirection', 'both')) in ['both', 'parents', 'children']:
+        raise DiagramError('Wrong value for "structure.focusDirection" key in config file')
+
+    stats = RunStats()
+    if args.profile:
+        stats.enable_profile()
+
+    with stats.measure('connect'):
+        layer = get_layer(config)
+
+    if args.verbose or args.stats_json or args.profile:
+        layer.set_stats(stats)
+
+    if args.snapshot:
+        write_snapshot(args.snapshot, layer.get_snapshot())
+        return
+
+    if args.extract:
+        layer.get_table_structure()
+
+        description_store = ExtConfig(config).get('structure', 'descriptionStore', None)
+        if description_store:
+            count = DescriptionStore(str(description_store)).merge(layer.get_description_entries())
+            sys.stdout.write(f'{count} descriptions added to {description_store}\n')
+            return
+
+        config['descriptions'] = layer.get_descriptions()
+        dump_config(args.config, config)
+        return
+
+    if args.watch:
+        watch_diagram(args, layer, stats)
+    else:
+        build_diagram(args, layer, stats)
+
+
+def build_diagram(args, layer, stats):
+    with stats.measure('columns'):
+        layer.get_table_structure()
+
+    with stats.measure('constraints'):
+        layer.get_constraints()
+
+    output = args.output
+    if args.update:
+        if os.path.exists(args.update):
+            with stats.measure('previous'):
+                layer.set_previous_diagram(PreviousDiagram().load(args.update))
+
+        if not output:
+            output = args.update
+
+    compressed = args.compress or bool(layer._config.get('diagram', 'compressed', False))
+
+    if output:
+        with atomic_output(output) as f:
+            write_diagram(layer, f, compressed, stats)
+    else:
+        write_diagram(layer, sys.stdout, compressed, stats)
+
+    stats.counts = layer.get_counts()
+    if output:
+        stats.counts['output_bytes'] = os.path.getsize(output)
+
+    if args.verbose:
+        stats.write_report(sys.stderr)
+
+    if args.stats_json:
+        stats.write_json(args.stats_json)
+
+    if args.profile:
+        stats.write_profile(args.profile)
+
+
+def watch_diagram(args, layer, stats):
+    if not args.output and not args.update:
+        raise DiagramError('--watch needs --output or --update file')
+
+    config = layer._config
+    interval = float(config.get('watch', 'interval', 10))
+    debounce = float(config.get('watch', 'debounce', 5))
+    channel = config.get('watch', 'channel', None)
+    built = None
+
+    while True:
+        try:
+            if not layer.is_connected():
+                layer.connect()
+
+            if channel:
+                layer.listen(channel)
+
+            fingerprint = layer.get_fingerprint()
+            if fingerprint is None:
+                break
+
+            if built is not None:
+                if fingerprint == built:
+                    layer.wait(interval)
+                    continue
+
+                # a burst of migrations is rebuilt once, after the catalog stops changing
+                while True:
+                    time.sleep(debounce)
+                    layer.wait(0)
+                    latest = layer.get_fingerprint()
+                    if latest == fingerprint:
+                        break
+
+                    fingerprint = latest
+
+            start = time.time()
+            layer.reset(fingerprint)
+            if built is not None:
+                stats = RunStats()
+                if args.profile:
+                    stats.enable_profile()
+
+                if args.verbose or args.stats_json or args.profile:
+                    layer.set_stats(stats)
+
+            build_diagram(args, layer, stats)
+            built = fingerprint
+
+            tables = layer.get_counts()['tables']
+            sys.stdout.write(f"{time.strftime('%Y-%m-%d %H:%M:%S')} diagram written to {args.output or args.update} ({tables} tables, {time.time() - start:.2f} s)\n")
+            sys.stdout.flush()
+
+        except KeyboardInterrupt:
+            layer.close()
+            return
+
+        except Exception as e:
+            sys.stdout.write(f"{time.strftime('%Y-%m-%d %H:%M:%S')} ERROR: {str(e).strip()}\n")
+            sys.stdout.flush()
+            layer.close()
+            try:
+                time.sleep(interval)
+            except KeyboardInterrupt:
+                return
+
+    layer.close()
+    raise DiagramError('Database type does not support --watch')
+
+
+def argsError(error):
+    pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.error = argsError
+
+    parser.add_argument('--extract', '-e', action='store_true', default=False, help='Extract descriptions from DB into config file')
+    parser.add_argument('--config', '-c', help='Config file')
+    parser.add_argument('--output', '-o', help='Output file')
+    parser.add_argument('--update', '-u', help='Keep positions of unchanged tables from existing diagram file (written back unless --output is set)')
+    parser.add_argument('--compress', '-z', action='store_true', default=False, help='Write compressed draw.io file (mxfile)')
+    parser.add_argument('--focus', '-f', help='Comma separated tables (schema.table) in the middle of the diagram, only tables linked to them are shown')
+    parser.add_argument('--depth', '-d', type=int, help='Number of foreign key hops from focused tables (default 1)')
+    parser.add_argument('--direction', choices=['both', 'parents', 'children'], help='Follow foreign keys to referenced tables (parents), referencing tables (children) or both')
+    parser.add_argument('--snapshot', '-s', help='Write introspected schema into snapshot file (msgpack for .msgpack files, JSON lines otherwise) and exit')
+    parser.add_argument('--watch', '-w', action='store_true', default=False, help='Keep running and regenerate output file when database schema changes')
+    parser.add_argument('--serve', nargs='?', const='', help='Serve diagrams over HTTP on [host:]port (default from server section or 127.0.0.1:8080)')
+    parser.add_argument('--verbose', '-v', action='store_true', default=False, help='Print phase times, row and table counts and peak memory to stderr')
+    parser.add_argument('--stats-json', help='Write phase times, counts and peak memory into JSON file')
+    parser.add_argument('--profile', help='Write cProfile data (pstats format) of layout and rendering into file')
+
+    try:
+        args = parser.parse_args(argv)
+        run(args)
+    except DiagramError as e:
+        sys.stdout.write(f'ERROR: {e}\n')
+        sys.exit(1)
+    except Exception as e:
+        traceback.print_exc(file=sys.stdout)
+        sys.exit(1)
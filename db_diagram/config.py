@@ -0,0 +1,45 @@
+class DiagramError(Exception):
+    pass
+
+
+class ExtConfig:
+    def __init__(self, config):
+        self.config = config
+
+    def get(self, section, key, default):
+        try:
+            return self.config[section][key]
+        except Exception:
+            return default
+
+    def items(self, section):
+        try:
+            if section:
+                return self.config[section]
+            return self.config
+        except Exception:
+            return {}
+
+
+def get_yaml():
+    try:
+        import yaml
+    except ImportError:
+        raise DiagramError('Python library PyYAML is required for config files')
+
+    return yaml
+
+
+def load_config(path):
+    yaml = get_yaml()
+
+    # libyaml bindings are used when PyYAML was built with them
+    with open(path, 'r') as yaml_file:
+        return yaml.load(yaml_file, Loader=getattr(yaml, 'CSafeLoader', yaml.SafeLoader))
+
+
+def dump_config(path, config):
+    yaml = get_yaml()
+
+    with open(path, 'w') as yaml_file:
+        yaml.dump(config, yaml_file, Dumper=getattr(yaml, 'CSafeDumper', yaml.SafeDumper))
@@ -0,0 +1,141 @@
+def strongly_connected(succ):
+    # iterative Tarjan, components are numbered in reverse topological order (referenced tables last)
+    count = len(succ)
+    index = [-1] * count
+    lowlink = [0] * count
+    on_stack = [False] * count
+    component = [-1] * count
+    stack = []
+    counter = 0
+    components = 0
+
+    for root in range(count):
+        if index[root] >= 0:
+            continue
+
+        index[root] = lowlink[root] = counter
+        counter = counter + 1
+        stack.append(root)
+        on_stack[root] = True
+        frames = [(root, iter(succ[root]))]
+
+        while len(frames):
+            node, node_succ = frames[-1]
+            for following in node_succ:
+                if index[following] < 0:
+                    index[following] = lowlink[following] = counter
+                    counter = counter + 1
+                    stack.append(following)
+                    on_stack[following] = True
+                    frames.append((following, iter(succ[following])))
+                    break
+
+                if on_stack[following] and index[following] < lowlink[node]:
+                    lowlink[node] = index[following]
+            else:
+                frames.pop()
+                if frames and lowlink[node] < lowlink[frames[-1][0]]:
+                    lowlink[frames[-1][0]] = lowlink[node]
+
+                if lowlink[node] == index[node]:
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = False
+                        component[member] = components
+                        if member == node:
+                            break
+
+                    components = components + 1
+
+    return component, components
+
+
+class FKGraph:
+    # foreign keys between tables, built once after ingestion; parallel edges (several FKs or
+    # composite keys between the same tables) are merged, so every linked table appears once,
+    # and counted in the multiplicity of the edge (one per connection drawn)
+    def __init__(self, tables, connections):
+        self.tables = tables
+        index = self.index = {table: i for i, table in enumerate(tables)}
+
+        # tables without links share one empty tuple, lists are created with the first link;
+        # multiplicity runs parallel to childs
+        childs = self.childs = [()] * len(tables)
+        parents = self.parents = [()] * len(tables)
+        multiplicity = self.multiplicity = [()] * len(tables)
+
+        edges = {}
+        for connection in connections:
+            parent = index.get(connection['target'].table)
+            child = index.get(connection['source'].table)
+            if parent is None or child is None:
+                continue
+
+            edge = parent * len(tables) + child
+            position = edges.get(edge)
+            if position is not None:
+                multiplicity[parent][position] = multiplicity[parent][position] + 1
+                continue
+
+            if not childs[parent]:
+                childs[parent] = []
+                multiplicity[parent] = []
+
+            if not parents[child]:
+                parents[child] = []
+
+            edges[edge] = len(childs[parent])
+            childs[parent].append(tables[child])
+            multiplicity[parent].append(1)
+            parents[child].append(tables[parent])
+
+        # parent -> child direction, cycles and self references end up in one component
+        self.component, self.component_count = strongly_connected([[index[child] for child in childs] for childs in self.childs])
+
+    def get_childs(self, table):
+        return self.childs[self.index[table]]
+
+    def get_parents(self, table):
+        return self.parents[self.index[table]]
+
+    def get_in_degree(self, table):
+        # distinct tables referencing the table
+        return len(self.get_childs(table))
+
+    def get_out_degree(self, table):
+        # distinct tables referenced by the table
+        return len(self.get_parents(table))
+
+    def get_multiplicity(self, parent, child):
+        parent = self.index[parent]
+        for position, table in enumerate(self.childs[parent]):
+            if table is child:
+                return self.multiplicity[parent][position]
+
+        return 0
+
+    def get_component(self, table):
+        return self.component[self.index[table]]
+
+    def get_condensation(self):
+        # edges between components (parent component, child component) with summed multiplicity,
+        # the result is acyclic
+        component = self.component
+        index = self.index
+        edges = {}
+        for parent, childs in enumerate(self.childs):
+            for child, count in zip(childs, self.multiplicity[parent]):
+                key = (component[parent], component[index[child]])
+                if key[0] != key[1]:
+                    edges[key] = edges.get(key, 0) + count
+
+        return edges
+
+    def get_priority(self, table):
+        # same scale as before, but every referenced or referencing table counts once
+        parents = self.get_out_degree(table)
+        childs = self.get_in_degree(table)
+        if not parents and not childs:
+            return None
+
+        return 1000 + parents * (parents + 1) - 10 * childs - childs * (childs + 1)
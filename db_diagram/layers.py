@@ -0,0 +1,605 @@
+import os
+import time
+import json
+import select
+import urllib.parse
+import collections
+
+from .config import DiagramError, ExtConfig
+from .layout import walk_focus
+from .pgdump import PgDumpReader
+from .snapshot import SnapshotCache, get_row_values, read_snapshot
+from .structure import DBStructure
+
+
+def get_psycopg2():
+    # imported on first use, other layers work without it
+    try:
+        import psycopg2
+        import psycopg2.extensions
+        import psycopg2.extras
+        import psycopg2.sql
+    except ImportError:
+        raise DiagramError('Python library psycopg2 is required for database type "postgresql"')
+
+    return psycopg2
+
+
+class dbLayer:
+    _dsn = None
+    _config = None
+    _db_structure = None
+    _cache = None
+    _stats = None
+    _focus_relations = None
+    _cancelled = False
+
+    def __init__(self, dsn, config):
+        self._dsn = dsn
+        self._config = ExtConfig(config)
+
+        self.connect()
+        self._db_structure = DBStructure(self._config)
+        self.set_cache()
+
+    def set_cache(self, fingerprint=None):
+        self._cache = None
+        cache_directory = self._config.get('database', 'cache', None)
+        if cache_directory:
+            fingerprint = fingerprint or self.get_fingerprint()
+            if fingerprint:
+                key = json.dumps([self._dsn, self._config.get('database', 'type', None), self._config.items('structure')], sort_keys=True, default=str)
+                self._cache = SnapshotCache(str(cache_directory), key, fingerprint)
+
+    def set_config(self, config):
+        self._config = ExtConfig(config)
+        self._db_structure = DBStructure(self._config)
+        self._focus_relations = None
+        self._cache = None
+
+    def reset(self, fingerprint=None):
+        self._db_structure = DBStructure(self._config)
+        self._focus_relations = None
+        self.set_cache(fingerprint)
+
+    def listen(self, channel):
+        pass
+
+    def wait(self, timeout):
+        time.sleep(timeout)
+        return False
+
+    def add_branch(self, tree, vector, value):
+        key = vector[0]
+
+        if len(vector) == 1:
+            tree[key] = value
+        else:
+            self.add_branch(tree[key] if key in tree else {}, vector[1:], value)
+
+    def get_filter_params(self):
+        return {
+            'schemas': self._db_structure.get_schema_filter(),
+            'tables': [f'^(?:{x})' for x in self._db_structure.get_table_filter()]
+        }
+
+    def get_focus_params(self):
+        params = self.get_filter_params()
+        relations = self.get_focus_relations()
+        params['focus_schemas'] = [x[0] for x in relations] if relations is not None else None
+        params['focus_tables'] = [x[1] for x in relations] if relations is not None else None
+        return params
+
+    def get_focus_relations(self):
+        if not self._db_structure.get_focus():
+            return None
+
+        if self._focus_relations is None:
+            foreign_keys = self.read_foreign_keys()
+            if foreign_keys is None:
+                return None
+
+            childs = collections.defaultdict(set)
+            parents = collections.defaultdict(set)
+            for schema_name, table_name, foreign_schema_name, foreign_table_name in foreign_keys:
+                childs[(foreign_schema_name, foreign_table_name)].add((schema_name, table_name))
+                parents[(schema_name, table_name)].add((foreign_schema_name, foreign_table_name))
+
+            structure = self._db_structure
+            self._focus_relations = sorted(walk_focus(structure.get_focus_keys(), structure.focus_depth, structure.focus_direction, lambda key: childs.get(key, ()), lambda key: parents.get(key, ())))
+
+        return self._focus_relations
+
+    def read_foreign_keys(self):
+        return None
+
+    def get_fingerprint(self):
+        return None
+
+    def get_rows(self, kind, reader):
+        if not self._cache:
+            return reader()
+
+        rows = self._cache.load(kind)
+        if rows is None:
+            rows = self._cache.store(kind, reader())
+
+        return rows
+
+    def get_snapshot(self):
+        snapshot = {}
+        for kind, reader in [('columns', self.read_table_structure), ('constraints', self.read_constraints)]:
+            rows = snapshot[kind] = []
+            for row in self.get_rows(kind, reader):
+                if self._cancelled:
+                    raise DiagramError('Reading canceled')
+
+                rows.append(get_row_values(row))
+
+        return snapshot
+
+    def cancel(self):
+        # called from another thread, reading stops at the next row
+        self._cancelled = True
+
+    def is_cancelled(self):
+        return self._cancelled
+
+    def is_connected(self):
+        return True
+
+    def close(self):
+        pass
+
+    def set_stats(self, stats):
+        self._stats = stats
+
+    def get_stats_rows(self, kind, reader):
+        rows = self.get_rows(kind, reader)
+        if self._stats:
+            rows = self._stats.count_rows(kind, rows)
+
+        return rows
+
+    def get_table_structure(self):
+        for entry in self.get_stats_rows('columns', self.read_table_structure):
+            self._db_structure.add_table_entry(entry)
+
+    def get_constraints(self):
+        for entry in self.get_stats_rows('constraints', self.read_constraints):
+            self._db_structure.add_constraint(entry)
+
+        self._db_structure.build_graph()
+
+    def read_table_structure(self):
+        return []
+
+    def read_constraints(self):
+        return []
+
+    def set_previous_diagram(self, previous_diagram):
+        self._db_structure.set_previous_diagram(previous_diagram)
+
+    def to_diagram(self):
+        return self._db_structure.to_diagram()
+
+    def write_diagram(self, diagram):
+        self._db_structure.write_diagram(diagram)
+
+    def place_tables(self):
+        return self._db_structure.place_tables()
+
+    def render_diagram(self, diagram, placed):
+        self._db_structure.render_diagram(diagram, placed)
+
+    def get_pages(self):
+        return self._db_structure.page_mode
+
+    def write_pages(self, stream, compressed):
+        self._db_structure.write_pages(stream, compressed)
+
+    def get_counts(self):
+        return self._db_structure.get_counts()
+
+    def get_model(self):
+        return self._db_structure
+
+    def get_descriptions(self):
+        return self._db_structure.get_descriptions()
+
+    def get_description_entries(self):
+        return self._db_structure.get_description_entries()
+
+
+class pgLayer(dbLayer):
+    _connection = None
+    _cursor = None
+
+    def connect(self):
+        options = {}
+        timeout = self._config.get('database', 'timeout', None)
+        if timeout:
+            options['connect_timeout'] = max(1, int(float(timeout)))
+            options['options'] = f'-c statement_timeout={int(float(timeout) * 1000)}'
+
+        psycopg2 = get_psycopg2()
+        try:
+            self._connection = psycopg2.connect(self._dsn, **options)
+            self._connection.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+            self._cursor = self._connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        except psycopg2.Error as e:
+            raise DiagramError(str(e).strip())
+
+    _channel = None
+
+    def is_connected(self):
+        return self._connection is not None and not self._connection.closed
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+            self._channel = None
+
+    def cancel(self):
+        super().cancel()
+        connection = self._connection
+        if connection is not None:
+            # stops a running statement, safe to call from another thread
+            connection.cancel()
+
+    def listen(self, channel):
+        if self._channel != channel:
+            psycopg2 = get_psycopg2()
+            self._cursor.execute(psycopg2.sql.SQL('LISTEN {}').format(psycopg2.sql.Identifier(channel)))
+            self._channel = channel
+
+    def wait(self, timeout):
+        if not self._channel:
+            return super().wait(timeout)
+
+        # returns early on NOTIFY, e.g. sent by an event trigger on ddl_command_end
+        select.select([self._connection], [], [], timeout)
+        self._connection.poll()
+        notified = bool(self._connection.notifies)
+        del self._connection.notifies[:]
+        return notified
+
+    def fetch_rows(self, name, query, params=None):
+        if not bool(self._config.get('database', 'streaming', False)):
+            self._cursor.execute(query, params)
+            for row in self._cursor.fetchall():
+                yield row
+            return
+
+        fetch_size = int(self._config.get('database', 'fetchSize', 5000))
+
+        # named (server-side) cursors need a transaction, rows arrive as plain tuples
+        self._connection.autocommit = False
+        cursor = self._connection.cursor(name)
+        try:
+            cursor.itersize = fetch_size
+            cursor.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(fetch_size)
+                if not rows:
+                    break
+
+                for row in rows:
+                    yield row
+        finally:
+            cursor.close()
+            self._connection.rollback()
+            self._connection.autocommit = True
+
+    def get_fingerprint(self):
+        query_fingerprint = """
+            WITH rel AS (
+                SELECT c.oid, c.xmin
+                FROM pg_catalog.pg_class c
+                JOIN pg_catalog.pg_namespace n ON (n.oid = c.relnamespace)
+                WHERE c.relkind IN ('r', 'v', 'f', 'p')
+                    AND n.nspname = ANY(%(schemas)s)
+            )
+            SELECT md5(string_agg(entry, ',' ORDER BY entry)) AS fingerprint
+            FROM (
+                SELECT 'r' || rel.oid || ':' || rel.xmin AS entry FROM rel
+                UNION ALL
+                SELECT 'a' || a.attrelid || ':' || a.attnum || ':' || a.xmin
+                FROM pg_catalog.pg_attribute a
+                JOIN rel ON (rel.oid = a.attrelid)
+                WHERE a.attnum > 0
+                UNION ALL
+                SELECT 'k' || con.oid || ':' || con.xmin
+                FROM pg_catalog.pg_constraint con
+                JOIN rel ON (rel.oid = con.conrelid)
+                UNION ALL
+                SELECT 'd' || pgd.objoid || ':' || pgd.objsubid || ':' || pgd.xmin
+                FROM pg_catalog.pg_description pgd
+                JOIN rel ON (rel.oid = pgd.objoid AND pgd.classoid = 'pg_catalog.pg_class'::regclass)
+            ) entries
+        """
+
+        for row in list(self.fetch_rows('db_diagram_fingerprint', query_fingerprint, self.get_filter_params())):
+            fingerprint = row['fingerprint'] if isinstance(row, dict) else row[0]
+            return fingerprint or 'empty'
+
+    def read_table_structure(self):
+        query_tables = """
+            SELECT
+                n.nspname::TEXT AS table_schema,
+                c.relname::TEXT AS table_name,
+                a.attname::TEXT AS column_name,
+                COALESCE(bt.typname, t.typname)::TEXT AS udt_name,
+                a.attnum AS ordinal_position,
+                pgd.description::TEXT
+            FROM pg_catalog.pg_attribute a
+            JOIN pg_catalog.pg_class c ON (c.oid = a.attrelid)
+            JOIN pg_catalog.pg_namespace n ON (n.oid = c.relnamespace)
+            JOIN pg_catalog.pg_type t ON (t.oid = a.atttypid)
+            LEFT JOIN pg_catalog.pg_type bt ON (t.typtype = 'd' AND bt.oid = t.typbasetype)
+            LEFT JOIN pg_catalog.pg_description pgd ON (pgd.objoid = c.oid AND pgd.classoid = 'pg_catalog.pg_class'::regclass AND pgd.objsubid = a.attnum)
+            WHERE a.attnum > 0
+                AND NOT a.attisdropped
+                AND c.relkind IN ('r', 'v', 'f', 'p')
+                AND n.nspname = ANY(%(schemas)s)
+                AND c.relname ~ ANY(%(tables)s)
+                AND (%(focus_schemas)s::TEXT[] IS NULL OR (n.nspname::TEXT, c.relname::TEXT) IN (SELECT * FROM unnest(%(focus_schemas)s::TEXT[], %(focus_tables)s::TEXT[])))
+            ORDER BY n.nspname, c.relname, a.attnum
+        """
+
+        return self.fetch_rows('db_diagram_columns', query_tables, self.get_focus_params())
+
+    def read_foreign_keys(self):
+        query_foreign_keys = """
+            SELECT DISTINCT
+                n.nspname::TEXT AS table_schema,
+                c.relname::TEXT AS table_name,
+                fn.nspname::TEXT AS foreign_table_schema,
+                fc.relname::TEXT AS foreign_table_name
+            FROM pg_catalog.pg_constraint con
+            JOIN pg_catalog.pg_class c ON (c.oid = con.conrelid)
+            JOIN pg_catalog.pg_namespace n ON (n.oid = c.relnamespace)
+            JOIN pg_catalog.pg_class fc ON (fc.oid = con.confrelid)
+            JOIN pg_catalog.pg_namespace fn ON (fn.oid = fc.relnamespace)
+            WHERE con.contype = 'f'
+                AND n.nspname = ANY(%(schemas)s)
+                AND fn.nspname = ANY(%(schemas)s)
+                AND c.relname ~ ANY(%(tables)s)
+                AND fc.relname ~ ANY(%(tables)s)
+        """
+
+        return [get_row_values(row) for row in self.fetch_rows('db_diagram_foreign_keys', query_foreign_keys, self.get_filter_params())]
+
+    def read_constraints(self):
+        # conkey and confkey are unnested together, so composite keys give one row per ordered column pair
+        query_constraint = """
+            SELECT
+                CASE con.contype WHEN 'p' THEN 'PRIMARY KEY' WHEN 'u' THEN 'UNIQUE' ELSE 'FOREIGN KEY' END AS constraint_type,
+                n.nspname::TEXT AS table_schema,
+                con.conname::TEXT AS constraint_name,
+                c.relname::TEXT AS table_name,
+                a.attname::TEXT AS column_name,
+                COALESCE(fn.nspname, n.nspname)::TEXT AS foreign_table_schema,
+                COALESCE(fc.relname, c.relname)::TEXT AS foreign_table_name,
+                COALESCE(fa.attname, a.attname)::TEXT AS foreign_column_name
+            FROM pg_catalog.pg_constraint con
+            JOIN pg_catalog.pg_class c ON (c.oid = con.conrelid)
+            JOIN pg_catalog.pg_namespace n ON (n.oid = c.relnamespace)
+            CROSS JOIN LATERAL unnest(con.conkey, con.confkey) WITH ORDINALITY AS k(attnum, fattnum, position)
+            JOIN pg_catalog.pg_attribute a ON (a.attrelid = con.conrelid AND a.attnum = k.attnum)
+            LEFT JOIN pg_catalog.pg_class fc ON (fc.oid = con.confrelid)
+            LEFT JOIN pg_catalog.pg_namespace fn ON (fn.oid = fc.relnamespace)
+            LEFT JOIN pg_catalog.pg_attribute fa ON (fa.attrelid = con.confrelid AND fa.attnum = k.fattnum)
+            WHERE con.contype IN ('p', 'u', 'f')
+                AND n.nspname = ANY(%(schemas)s)
+                AND c.relname ~ ANY(%(tables)s)
+                AND (con.contype <> 'f' OR (fn.nspname = ANY(%(schemas)s) AND fc.relname ~ ANY(%(tables)s)))
+                AND (%(focus_schemas)s::TEXT[] IS NULL OR (n.nspname::TEXT, c.relname::TEXT) IN (SELECT * FROM unnest(%(focus_schemas)s::TEXT[], %(focus_tables)s::TEXT[])))
+            ORDER BY n.nspname, c.relname, con.conname, k.position
+        """
+
+        return self.fetch_rows('db_diagram_constraints', query_constraint, self.get_focus_params())
+
+
+class fileLayer(dbLayer):
+    def connect(self):
+        pass
+
+    def is_connected(self):
+        return os.path.isfile(self._dsn)
+
+    def get_fingerprint(self):
+        if not os.path.isfile(self._dsn):
+            return None
+
+        stat = os.stat(self._dsn)
+        return f'{stat.st_mtime_ns}:{stat.st_size}'
+
+
+class snapshotLayer(fileLayer):
+    def read_table_structure(self):
+        return read_snapshot(self._dsn, 'columns')
+
+    def read_constraints(self):
+        return read_snapshot(self._dsn, 'constraints')
+
+
+class sqliteLayer(fileLayer):
+    _connection = None
+    _inode = None
+    _constraints = None
+
+    def connect(self):
+        # imported on first use, like the drivers of the other database types
+        import sqlite3
+
+        self.close()
+        try:
+            # read only, a missing file is not created
+            self._inode = os.stat(self._dsn).st_ino
+            self._connection = sqlite3.connect(f'file:{urllib.parse.quote(self._dsn)}?mode=ro', uri=True, check_same_thread=False)
+            self._connection.create_function('db_diagram_table', 1, self.check_table_filter, deterministic=True)
+        except (OSError, sqlite3.Error) as e:
+            raise DiagramError(str(e).strip())
+
+    def is_connected(self):
+        # a replaced file is opened again
+        return self._connection is not None and super().is_connected() and os.stat(self._dsn).st_ino == self._inode
+
+    def check_table_filter(self, table_name):
+        return self._db_structure.check_table_filter(table_name)
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def cancel(self):
+        super().cancel()
+        connection = self._connection
+        if connection is not None:
+            connection.interrupt()
+
+    def get_fingerprint(self):
+        if not self.is_connected():
+            return super().get_fingerprint()
+
+        # schema_version changes with every DDL statement, data writes keep it
+        schema_version = self._connection.execute('PRAGMA schema_version').fetchone()[0]
+        return f'{self._inode}:{schema_version}'
+
+    def fetch_rows(self, query, params=()):
+        if not 'main' in self._db_structure.get_schema_filter():
+            return
+
+        cursor = self._connection.execute(query, params)
+        try:
+            for row in cursor:
+                yield row
+        finally:
+            cursor.close()
+
+    def reset(self, fingerprint=None):
+        self._constraints = None
+        super().reset(fingerprint)
+
+    def read_catalog(self, first_kind):
+        # one pass over sqlite_master for columns (kind 0) and keys (kinds 1-3), rows come
+        # sorted by kind, so columns arrive before any key; foreign keys without referenced
+        # columns point to the primary key of the referenced table
+        query_catalog = """
+            WITH t AS (
+                SELECT name, type FROM sqlite_master
+                WHERE type IN ('table', 'view')
+                    AND name NOT LIKE 'sqlite\\_%' ESCAPE '\\'
+                    AND db_diagram_table(name)
+            )
+            SELECT * FROM (
+                SELECT 0 AS kind, 'main', t.name, p.name, p.type, p.cid + 1, NULL, NULL, NULL, t.name AS sort_table, p.cid AS sort_1, 0 AS sort_2
+                FROM t
+                JOIN pragma_table_info(t.name) AS p
+                UNION ALL
+                SELECT 1, 'PRIMARY KEY', 'main', t.name || '_pkey', t.name, p.name, 'main', t.name, p.name, t.name, p.pk, 0
+                FROM t
+                JOIN pragma_table_info(t.name) AS p
+                WHERE t.type = 'table' AND p.pk > 0
+                UNION ALL
+                SELECT 2, 'UNIQUE', 'main', i.name, t.name, c.name, 'main', t.name, c.name, t.name, i.seq, c.seqno
+                FROM t
+                JOIN pragma_index_list(t.name) AS i
+                JOIN pragma_index_info(i.name) AS c
+                WHERE t.type = 'table' AND i."unique" AND i.origin = 'u'
+                UNION ALL
+                SELECT 3, 'FOREIGN KEY', 'main', t.name || '_fkey_' || f.id, t.name, f."from", 'main', f."table", COALESCE(f."to", k.name), t.name, f.id, f.seq
+                FROM t
+                JOIN pragma_foreign_key_list(t.name) AS f
+                LEFT JOIN pragma_table_info(f."table") AS k ON (f."to" IS NULL AND k.pk = f.seq + 1)
+                WHERE t.type = 'table' AND db_diagram_table(f."table")
+            )
+            WHERE kind >= ?
+            ORDER BY kind, sort_table, sort_1, sort_2
+        """
+
+        return self.fetch_rows(query_catalog, (first_kind,))
+
+    def read_table_structure(self):
+        # key rows of the same query are kept for read_constraints
+        constraints = []
+        for row in self.read_catalog(0):
+            if row[0]:
+                constraints.append(row[1:9])
+            else:
+                yield row[1:7]
+
+        self._constraints = constraints
+
+    def read_constraints(self):
+        if self._constraints is None:
+            # columns came from a cache, only keys are read
+            return [row[1:9] for row in self.read_catalog(1)]
+
+        constraints, self._constraints = self._constraints, None
+        return constraints
+
+
+class pgDumpLayer(fileLayer):
+    _reader = None
+
+    def reset(self, fingerprint=None):
+        self._reader = None
+        super().reset(fingerprint)
+
+    def get_reader(self):
+        if self._reader is None:
+            for row in self.read_table_structure():
+                pass
+
+        return self._reader
+
+    def read_table_structure(self):
+        self._reader = PgDumpReader()
+        with open(self._dsn, 'r', encoding='utf-8') as f:
+            for row in self._reader.read(f):
+                yield row
+
+    def read_constraints(self):
+        return self.get_reader().constraints
+
+    def get_table_structure(self):
+        super().get_table_structure()
+
+        # COMMENT ON COLUMN statements follow the tables in the dump
+        for (schema_name, table_name, column_name), description in self.get_reader().comments.items():
+            self._db_structure.set_column_description(schema_name, table_name, column_name, description)
+
+    def get_snapshot(self):
+        snapshot = super().get_snapshot()
+        comments = self.get_reader().comments
+        snapshot['columns'] = [row[:5] + (comments.get(row[:3], row[5]),) for row in snapshot['columns']]
+        return snapshot
+
+
+layer_types = {
+    'postgresql': pgLayer,
+    'sqlite': sqliteLayer,
+    'snapshot': snapshotLayer,
+    'pgdump': pgDumpLayer
+}
+
+
+def get_layer(config):
+    database = ExtConfig(config).items('database')
+    if not database:
+        raise DiagramError('Missing "database" key in config file')
+
+    if not 'dsn' in database:
+        raise DiagramError('Missing "database.dsn" key in config file')
+
+    if not 'type' in database:
+        raise DiagramError('Missing "database.type" key in config file')
+
+    if not database['type'] in layer_types:
+        raise DiagramError('Wrong value for "database.type" key in config file')
+
+    return layer_types[database['type']](database['dsn'], config)
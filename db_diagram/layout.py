@@ -0,0 +1,551 @@
+import bisect
+
+
+class LayoutTable:
+    def __init__(self, column_count = 0, priority = None, component = None):
+        self.column_count = column_count
+        self.x = 0
+        self.y = 0
+        self.column_number = 0
+        self.priority = priority
+        self.component = component
+        self.childs = ()
+        self.parents = ()
+        self.used_in_diagram = False
+
+    def get_priority(self):
+        if not self.priority:
+            return 10000
+        return self.priority
+
+    def set_column(self, column):
+        self.column_number = column
+
+    def get_column(self):
+        return self.column_number
+
+    def set_position(self, x, y):
+        self.x = x
+        self.y = y
+
+    def get_childs(self):
+        return self.childs
+
+    def get_parents(self):
+        return self.parents
+
+    def set_childs(self, childs):
+        self.childs = childs
+
+    def set_parents(self, parents):
+        self.parents = parents
+
+    def set_used_in_diagram(self):
+        self.used_in_diagram = True
+
+    def get_used_in_diagram(self):
+        return self.used_in_diagram
+
+    def get_column_counts(self):
+        return self.column_count
+
+
+class LayoutColumns:
+    def __init__(self, center):
+        self.center = center
+        self.columns = []
+
+    def __getitem__(self, index):
+        while index >= len(self.columns):
+            self.columns.append([self.center, self.center, 'down'])
+
+        return self.columns[index]
+
+    def __iter__(self):
+        return iter(self.columns)
+
+    def __len__(self):
+        return len(self.columns)
+
+
+def merge_spans(spans, gap = 0):
+    # sorted (top, bottom) spans, spans closer than gap are joined
+    merged = []
+    for top, bottom in spans:
+        if merged and top <= merged[-1][1] + gap:
+            if bottom > merged[-1][1]:
+                merged[-1] = (merged[-1][0], bottom)
+        else:
+            merged.append((top, bottom))
+
+    return merged
+
+
+class ColumnSpans:
+    # vertical spans taken by tables, per column, in a segment tree over the columns so the
+    # spans of a range of columns are merged from a few precomputed lists
+    def __init__(self, columns, gap = 0):
+        self.gap = gap
+        self.xs = [x for x, spans in columns]
+        self.size = 1
+        while self.size < len(columns):
+            self.size = self.size * 2
+
+        self.tree = [[] for i in range(2 * self.size)]
+        for i, (x, spans) in enumerate(columns):
+            self.tree[self.size + i] = merge_spans(sorted(spans), gap)
+
+        for i in range(self.size - 1, 0, -1):
+            self.tree[i] = merge_spans(sorted(self.tree[2 * i] + self.tree[2 * i + 1]), gap)
+
+    def get_range(self, low_x, high_x):
+        # indexes of columns starting between low_x and high_x
+        return bisect.bisect_right(self.xs, low_x), bisect.bisect_left(self.xs, high_x)
+
+    def get_spans(self, start, end):
+        spans = []
+        start = start + self.size
+        end = end + self.size
+        while start < end:
+            if start & 1:
+                spans.extend(self.tree[start])
+                start = start + 1
+
+            if end & 1:
+                end = end - 1
+                spans.extend(self.tree[end])
+
+            start = start // 2
+            end = end // 2
+
+        return merge_spans(sorted(spans), self.gap)
+
+
+class ColumnLayout:
+    def __init__(self, column_width, column_center, column_max_height, change_placement_direction = True, child_offset_fix = False, child_priority_fix = False, parent_priority_fix = False):
+        self.column_width = column_width
+        self.column_center = column_center
+        self.column_max_height = column_max_height
+        self.change_placement_direction = change_placement_direction
+        self.child_offset_fix = child_offset_fix
+        self.child_priority_fix = child_priority_fix
+        self.parent_priority_fix = parent_priority_fix
+
+    def place(self, tables, x, first_column):
+        self.x = x
+        self.first_column = first_column
+        self.placed = []
+
+        columns = LayoutColumns(self.column_center)
+        column = 0
+        last_used_column = None
+
+        for table in tables:
+            table_childs = table.get_childs()
+            table_parents = table.get_parents()
+
+            if not len(table_childs) and not len(table_parents) and not last_used_column:
+                for i, col in enumerate(columns):
+                    if col[1] - col[0]:
+                        last_used_column = i
+                        column = i + 1
+
+            if columns[column][1] - columns[column][0] > self.column_max_height:
+                column = column + 1
+
+            added = self.add_diagram_table(table, columns, column, 'down')
+            if not added:
+                continue
+
+        return self.placed
+
+    def add_diagram_table(self, table, columns, column, force_direction = None):
+        # explicit stack of placement frames instead of recursion, FK chains can be arbitrarily deep
+        stack = [self.place_diagram_table(table, columns, column, force_direction)]
+        added = None
+
+        while len(stack):
+            try:
+                call = next(stack[-1])
+            except StopIteration as result:
+                stack.pop()
+                added = result.value
+                continue
+
+            stack.append(self.place_diagram_table(*call))
+
+        return added
+
+    def place_diagram_table(self, table, columns, column, force_direction = None):
+        already_used = table.get_used_in_diagram()
+        if already_used:
+            return None
+
+        if column < 0:
+            column = 0
+
+        table.set_used_in_diagram()
+
+        x = self.x + (self.first_column + column) * self.column_width
+
+        table_height = (table.get_column_counts() * 26) + 78
+
+        direction = None
+
+        if self.change_placement_direction:
+            if force_direction:
+                direction = force_direction
+            else:
+                if columns[column][2] == 'down':
+                    columns[column][2] = 'up'
+
+                else:
+                    columns[column][2] = 'down'
+        else:
+            direction = 'down'
+
+        if direction == 'down':
+            y = columns[column][1]
+            columns[column][1] = columns[column][1] + table_height
+
+        else:
+            y = columns[column][0] - table_height
+            columns[column][0] = y
+
+        table.set_position(x, y)
+
+        table.set_column(self.first_column + column)
+        self.placed.append(table)
+
+        child_column_offset = 2
+
+        switch_directions = False
+        child_direction = direction
+        table_childs = table.get_childs()
+
+        if self.child_priority_fix:
+            table_childs = sorted(table_childs, key=lambda table: table.get_priority())
+
+        for table_child in table_childs:
+
+            if self.child_offset_fix and child_column_offset == 2 and len(table_child.get_parents()) > 0 and len(table_child.get_childs()) == 0:
+                column_offset = column + 1
+            else:
+                column_offset = column + child_column_offset
+
+            if not switch_directions and columns[column_offset][1] - columns[column_offset][0] == 0:
+                switch_directions = True
+
+            yield (table_child, columns, column_offset, child_direction)
+
+            if columns[column_offset][1] - columns[column_offset][0] > self.column_max_height:
+                child_column_offset = child_column_offset + 1
+
+            if self.change_placement_direction and switch_directions:
+                if child_direction == 'up':
+                    child_direction = 'down'
+                else:
+                    child_direction = 'up'
+
+        table_parents = table.get_parents()
+
+        if self.parent_priority_fix:
+            table_parents = sorted(table_parents, key=lambda table: table.get_priority())
+
+        for table_parent in table_parents:
+            yield (table_parent, columns, column - 1, direction)
+
+        return True
+
+
+class LayeredLayout:
+    max_dummy_span = 8
+
+    def __init__(self, column_width, column_center, column_max_height, iterations = 4, ordering = 'barycenter', isolated_max_height = 1000):
+        self.column_width = column_width
+        self.column_center = column_center
+        self.column_max_height = column_max_height
+        self.isolated_max_height = column_max_height or isolated_max_height
+        self.iterations = iterations
+        self.ordering = ordering
+
+    def place(self, tables, x, first_column):
+        tables = [table for table in tables if not table.get_used_in_diagram()]
+        index = {table: i for i, table in enumerate(tables)}
+
+        childs = []
+        for i, table in enumerate(tables):
+            table_childs = []
+            for child in table.get_childs():
+                j = index.get(child)
+                if j is not None and j != i:
+                    table_childs.append(j)
+
+            childs.append(list(dict.fromkeys(table_childs)))
+
+        order = sorted(range(len(tables)), key=lambda i: tables[i].get_priority())
+        succ, pred = self.break_cycles(order, childs, [table.component for table in tables])
+        layers, isolated = self.assign_layers(order, succ, pred)
+        self.order_layers(layers)
+
+        placed = []
+        column = first_column
+        for layer in layers:
+            column = self.place_nodes([node for node in layer if node < len(tables)], tables, x, column, placed, self.column_max_height) + 1
+
+        # tables without links are always wrapped, a single column of them would be endless
+        self.place_nodes(isolated, tables, x, column, placed, self.isolated_max_height)
+        return placed
+
+    def break_cycles(self, order, childs, component):
+        # edges between strongly connected components of the FK graph are kept, inside a component
+        # depth first search reverses edges pointing back to a node on the stack
+        succ = [[] for i in childs]
+        pred = [[] for i in childs]
+        cyclic = [[] for i in childs]
+        for node, node_childs in enumerate(childs):
+            for child in node_childs:
+                if component[child] == component[node]:
+                    cyclic[node].append(child)
+                else:
+                    succ[node].append(child)
+                    pred[child].append(node)
+
+        state = [0] * len(childs)
+
+        for root in order:
+            if state[root] or not cyclic[root]:
+                continue
+
+            state[root] = 1
+            stack = [(root, iter(cyclic[root]))]
+            while len(stack):
+                node, node_childs = stack[-1]
+                for child in node_childs:
+                    if state[child] == 1:
+                        succ[child].append(node)
+                        pred[node].append(child)
+                        continue
+
+                    succ[node].append(child)
+                    pred[child].append(node)
+
+                    if not state[child]:
+                        state[child] = 1
+                        stack.append((child, iter(cyclic[child])))
+                        break
+                else:
+                    state[node] = 2
+                    stack.pop()
+
+        succ = [list(dict.fromkeys(x)) for x in succ]
+        pred = [list(dict.fromkeys(x)) for x in pred]
+        return succ, pred
+
+    def assign_layers(self, order, succ, pred):
+        # longest path layering in topological order, sources are then pulled next to their childs
+        indegree = [len(x) for x in pred]
+        level = [0] * len(succ)
+        queue = [i for i in order if not indegree[i]]
+
+        for node in queue:
+            for child in succ[node]:
+                if level[node] + 1 > level[child]:
+                    level[child] = level[node] + 1
+
+                indegree[child] = indegree[child] - 1
+                if not indegree[child]:
+                    queue.append(child)
+
+        for node in queue:
+            if not pred[node] and succ[node]:
+                level[node] = min([level[child] for child in succ[node]]) - 1
+
+        layers = []
+        isolated = []
+        for node in queue:
+            if not succ[node] and not pred[node]:
+                isolated.append(node)
+                continue
+
+            while len(layers) <= level[node]:
+                layers.append([])
+
+            layers[level[node]].append(node)
+
+        # edges spanning a few layers get a dummy node in every layer they pass,
+        # longer edges stay direct links so the node count stays linear
+        self.up = [list(x) for x in pred]
+        self.down = [list(x) for x in succ]
+        for node in queue:
+            for child_position, child in enumerate(self.down[node]):
+                if level[child] - level[node] < 2 or level[child] - level[node] > self.max_dummy_span:
+                    continue
+
+                previous = node
+                for dummy_level in range(level[node] + 1, level[child]):
+                    dummy = len(self.up)
+                    self.up.append([previous])
+                    self.down.append([])
+                    layers[dummy_level].append(dummy)
+                    if previous == node:
+                        self.down[node][child_position] = dummy
+                    else:
+                        self.down[previous].append(dummy)
+
+                    previous = dummy
+
+                self.down[previous].append(child)
+                self.up[child][self.up[child].index(node)] = previous
+
+        return layers, isolated
+
+    def order_layers(self, layers):
+        self.position = [0.0] * len(self.up)
+        for layer in layers:
+            self.set_positions(layer)
+
+        best = [list(layer) for layer in layers]
+        best_crossings = self.count_crossings(layers)
+
+        for iteration in range(self.iterations):
+            if not best_crossings:
+                break
+
+            for layer in layers[1:]:
+                self.reorder(layer, self.up)
+
+            for layer in reversed(layers[:-1]):
+                self.reorder(layer, self.down)
+
+            crossings = self.count_crossings(layers)
+            if crossings < best_crossings:
+                best = [list(layer) for layer in layers]
+                best_crossings = crossings
+
+        layers[:] = best
+
+    def set_positions(self, layer):
+        size = float(len(layer))
+        for rank, node in enumerate(layer):
+            self.position[node] = rank / size
+
+    def reorder(self, layer, neighbours):
+        position = self.position
+        keys = {}
+
+        for node in layer:
+            values = [position[x] for x in neighbours[node]]
+            if not values:
+                keys[node] = position[node]
+
+            elif self.ordering == 'median':
+                values.sort()
+                keys[node] = values[len(values) // 2]
+
+            else:
+                keys[node] = sum(values) / len(values)
+
+        layer.sort(key=lambda node: keys[node])
+        self.set_positions(layer)
+
+    def count_crossings(self, layers):
+        # inversions between consecutive layers counted with a Fenwick tree, O(E log V)
+        crossings = 0
+        for upper, lower in zip(layers, layers[1:]):
+            rank = {node: i for i, node in enumerate(lower)}
+            targets = []
+            for node in upper:
+                targets.extend(sorted([rank[child] for child in self.down[node] if child in rank]))
+
+            tree = [0] * (len(lower) + 1)
+            for seen, target in enumerate(targets):
+                i = target + 1
+                smaller = 0
+                while i > 0:
+                    smaller = smaller + tree[i]
+                    i = i - (i & -i)
+
+                crossings = crossings + seen - smaller
+
+                i = target + 1
+                while i <= len(lower):
+                    tree[i] = tree[i] + 1
+                    i = i + (i & -i)
+
+        return crossings
+
+    def place_nodes(self, nodes, tables, x, column, placed, max_height):
+        chunks = [[]]
+        height = 0
+        for node in nodes:
+            table_height = (tables[node].get_column_counts() * 26) + 78
+            if max_height and height and height + table_height > max_height:
+                chunks.append([])
+                height = 0
+
+            chunks[-1].append(node)
+            height = height + table_height
+
+        for chunk in chunks:
+            if not chunk:
+                continue
+
+            heights = [(tables[node].get_column_counts() * 26) + 78 for node in chunk]
+            y = self.column_center - sum(heights) // 2
+            for node, table_height in zip(chunk, heights):
+                table = tables[node]
+                table.set_used_in_diagram()
+                table.set_position(x + column * self.column_width, y)
+                table.set_column(column)
+                placed.append(table)
+                y = y + table_height
+
+            column = column + 1
+
+        return column - 1
+
+
+def walk_focus(start, depth, direction, get_childs, get_parents):
+    reached = set(start)
+    current = list(reached)
+    for level in range(depth):
+        following = []
+        for node in current:
+            if direction != 'parents':
+                following.extend(x for x in get_childs(node) if x not in reached)
+
+            if direction != 'children':
+                following.extend(x for x in get_parents(node) if x not in reached)
+
+        reached.update(following)
+        current = following
+        if not current:
+            break
+
+    return reached
+
+
+def get_component_spec(tables):
+    index = {table: i for i, table in enumerate(tables)}
+    return [(
+        table.get_column_counts(),
+        table.priority,
+        table.component,
+        [index.get(child, -1) for child in table.get_childs()],
+        [index.get(parent, -1) for parent in table.get_parents()]
+    ) for table in tables]
+
+
+def layout_component(layout, spec):
+    # runs in a worker process on plain layout tables, links outside the component point to a placed stand-in
+    outside = LayoutTable()
+    outside.set_used_in_diagram()
+
+    tables = [LayoutTable(column_count, priority, component) for column_count, priority, component, childs, parents in spec]
+    for table, (column_count, priority, component, childs, parents) in zip(tables, spec):
+        table.childs = [tables[i] if i >= 0 else outside for i in childs]
+        table.parents = [tables[i] if i >= 0 else outside for i in parents]
+
+    layout.place(tables, 0, 0)
+    return [(table.x, table.y, table.get_column()) for table in tables]
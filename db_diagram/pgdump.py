@@ -0,0 +1,241 @@
+import re
+
+
+identifier_pattern = r'(?:"(?:[^"]|"")*"|[A-Za-z_][A-Za-z0-9_$]*)'
+
+
+name_pattern = fr'{identifier_pattern}(?:\s*\.\s*{identifier_pattern})*'
+
+
+identifier_re = re.compile(identifier_pattern)
+
+
+pg_type_names = {
+    'bigint': 'int8',
+    'bigserial': 'int8',
+    'bit varying': 'varbit',
+    'boolean': 'bool',
+    'char': 'bpchar',
+    'character': 'bpchar',
+    'character varying': 'varchar',
+    'decimal': 'numeric',
+    'double precision': 'float8',
+    'int': 'int4',
+    'integer': 'int4',
+    'real': 'float4',
+    'serial': 'int4',
+    'smallint': 'int2',
+    'smallserial': 'int2',
+    'time with time zone': 'timetz',
+    'time without time zone': 'time',
+    'timestamp with time zone': 'timestamptz',
+    'timestamp without time zone': 'timestamp'
+}
+
+
+def split_identifiers(text):
+    return [x[1:-1].replace('""', '"') if x.startswith('"') else x.lower() for x in identifier_re.findall(text)]
+
+
+split_items_re = re.compile(r'[(),\'"]')
+
+
+def split_items(text):
+    items = []
+    depth = 0
+    quote = None
+    start = 0
+    for match in split_items_re.finditer(text):
+        char = match.group(0)
+        if quote:
+            if char == quote:
+                quote = None
+
+        elif char in '\'"':
+            quote = char
+
+        elif char == '(':
+            depth = depth + 1
+
+        elif char == ')':
+            if depth == 0:
+                items.append(text[start:match.start()].strip())
+                return [x for x in items if x]
+
+            depth = depth - 1
+
+        elif depth == 0:
+            items.append(text[start:match.start()].strip())
+            start = match.end()
+
+    items.append(text[start:].strip())
+    return [x for x in items if x]
+
+
+class PgDumpReader:
+    statement_re = re.compile(r"""'|"|\$(?:[A-Za-z_][A-Za-z0-9_]*)?\$""")
+    statement_prefixes = ('CREATE TABLE', 'CREATE UNLOGGED TABLE', 'CREATE FOREIGN TABLE', 'CREATE DOMAIN', 'ALTER TABLE', 'COMMENT ON COLUMN')
+    table_re = re.compile(fr'CREATE\s+(?:UNLOGGED\s+|FOREIGN\s+)?TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?({name_pattern})\s*\(', re.S)
+    domain_re = re.compile(fr'CREATE\s+DOMAIN\s+({name_pattern})\s+AS\s+(.*?)(?:\s+(?:COLLATE|DEFAULT|CONSTRAINT|NOT\s+NULL|NULL|CHECK)\b.*)?;\s*$', re.S)
+    column_re = re.compile(fr'({identifier_pattern})\s+(.*?)(?:\s+(?:COLLATE|DEFAULT|CONSTRAINT|NOT\s+NULL|NULL|CHECK|REFERENCES|PRIMARY\s+KEY|UNIQUE|GENERATED)\b.*)?$', re.S)
+    alter_re = re.compile(fr'ALTER\s+TABLE\s+(?:ONLY\s+)?(?:IF\s+EXISTS\s+)?({name_pattern})\s+ADD\s+(.*?);\s*$', re.S)
+    constraint_re = re.compile(fr'(?:CONSTRAINT\s+({identifier_pattern})\s+)?(PRIMARY\s+KEY|UNIQUE|FOREIGN\s+KEY)\s*(?:NULLS\s+(?:NOT\s+)?DISTINCT\s*)?\(([^)]*)\)(?:\s*REFERENCES\s+({name_pattern})\s*(?:\(([^)]*)\))?)?', re.S)
+    table_constraint_re = re.compile(r'(?:CONSTRAINT|PRIMARY\s+KEY|FOREIGN\s+KEY|UNIQUE|CHECK|EXCLUDE|LIKE)\b')
+    comment_re = re.compile(fr"COMMENT\s+ON\s+COLUMN\s+({name_pattern})\s+IS\s+(?:'((?:[^']|'')*)'|NULL)\s*;\s*$", re.S)
+
+    def __init__(self):
+        self.domains = {}
+        self.types = {}
+        self.keys = {}
+        self.constraints = []
+        self.comments = {}
+
+    def get_statements(self, stream):
+        buffer = []
+        keep = False
+        quote = None
+
+        for line in stream:
+            if not buffer and quote is None:
+                stripped = line.lstrip()
+                if not stripped or stripped.startswith('--'):
+                    continue
+
+                keep = stripped.startswith(self.statement_prefixes)
+
+            if keep:
+                buffer.append(line)
+            else:
+                buffer = [None]
+
+            if quote is not None or '\'' in line or '"' in line or '$' in line:
+                quote = self.scan_quotes(line, quote)
+
+            if quote is None and line.rstrip().endswith(';'):
+                if keep:
+                    yield ''.join(buffer)
+
+                buffer = []
+
+    def scan_quotes(self, line, quote):
+        position = 0
+        while True:
+            if quote is not None:
+                end = line.find(quote, position)
+                if end < 0:
+                    return quote
+
+                position = end + len(quote)
+                quote = None
+
+            match = self.statement_re.search(line, position)
+            if not match:
+                return None
+
+            quote = match.group(0)
+            position = match.end()
+
+    def get_table_name(self, text):
+        names = split_identifiers(text)
+        if len(names) == 1:
+            return 'public', names[0]
+
+        return names[-2], names[-1]
+
+    def get_udt_name(self, text):
+        udt_name = self.types.get(text)
+        if udt_name is None:
+            udt_name = self.types[text] = self.read_udt_name(text)
+
+        return udt_name
+
+    def read_udt_name(self, text):
+        text = ' '.join(text.split())
+        array = ''
+        while text.endswith('[]'):
+            array = '_'
+            text = text[:-2].rstrip()
+
+        text = re.sub(r'\s*\([^)]*\)', '', text)
+        text = re.sub(r'\s+ARRAY(?:\[\d*\])?$', '', text, flags=re.I)
+
+        names = split_identifiers(text) if text.startswith('"') or '.' in text else [text.lower()]
+        name = '.'.join(names)
+        if name in self.domains:
+            return self.domains[name] if not array else array + self.domains[name].lstrip('_')
+
+        type_name = names[-1]
+        if not text.endswith('"'):
+            if type_name.startswith('interval'):
+                type_name = 'interval'
+
+            type_name = pg_type_names.get(type_name, type_name)
+
+        return array + type_name
+
+    def read(self, stream):
+        for statement in self.get_statements(stream):
+            if statement.startswith('CREATE'):
+                match = self.domain_re.match(statement)
+                if match:
+                    self.domains['.'.join(split_identifiers(match.group(1)))] = self.read_udt_name(match.group(2))
+                    self.types = {}
+                    continue
+
+                match = self.table_re.match(statement)
+                if not match:
+                    continue
+
+                schema_name, table_name = self.get_table_name(match.group(1))
+                position = 0
+                for item in split_items(statement[match.end():]):
+                    if self.table_constraint_re.match(item):
+                        self.add_constraint(schema_name, table_name, item)
+                        continue
+
+                    column = self.column_re.match(item)
+                    if column:
+                        position = position + 1
+                        column_name = column.group(1)
+                        column_name = split_identifiers(column_name)[0] if column_name.startswith('"') else column_name.lower()
+                        yield (schema_name, table_name, column_name, self.get_udt_name(column.group(2)), position, None)
+
+            elif statement.startswith('ALTER'):
+                match = self.alter_re.match(statement)
+                if match:
+                    schema_name, table_name = self.get_table_name(match.group(1))
+                    self.add_constraint(schema_name, table_name, match.group(2))
+
+            else:
+                match = self.comment_re.match(statement)
+                if match and match.group(2) is not None:
+                    names = split_identifiers(match.group(1))
+                    if len(names) == 2:
+                        names.insert(0, 'public')
+
+                    self.comments[tuple(names[-3:])] = match.group(2).replace("''", "'")
+
+    def add_constraint(self, schema_name, table_name, text):
+        match = self.constraint_re.match(text)
+        if not match:
+            return
+
+        constraint_name, constraint_type, columns, foreign_table, foreign_columns = match.groups()
+        constraint_type = ' '.join(constraint_type.split())
+        constraint_name = split_identifiers(constraint_name)[0] if constraint_name else ''
+        columns = split_identifiers(columns)
+
+        if constraint_type == 'FOREIGN KEY':
+            foreign_schema_name, foreign_table_name = self.get_table_name(foreign_table)
+            if foreign_columns:
+                foreign_columns = split_identifiers(foreign_columns)
+            else:
+                foreign_columns = self.keys.get((foreign_schema_name, foreign_table_name), [])
+
+        else:
+            foreign_schema_name, foreign_table_name, foreign_columns = schema_name, table_name, columns
+            if constraint_type == 'PRIMARY KEY':
+                self.keys[(schema_name, table_name)] = columns
+
+        for column_name, foreign_column_name in zip(columns, foreign_columns):
+            self.constraints.append((constraint_type, schema_name, constraint_name, table_name, column_name, foreign_schema_name, foreign_table_name, foreign_column_name))
@@ -0,0 +1,166 @@
+import collections
+
+from .writer import escape_value
+
+
+class DiagramSettings(collections.namedtuple('DiagramSettings', [
+        'table_width',
+        'comment_width',
+        'placement_comment_width',
+        'constraint_color',
+        'constraint_width',
+        'constraint_opacity',
+        'foreign_key_color',
+        'unique_color',
+        'primary_key_color',
+        'group_table_with_comment',
+        'append_column_type',
+        'prepend_schema_name'
+    ])):
+    __slots__ = ()
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            table_width=int(config.get('diagram', 'tableWidth', 200)),
+            comment_width=int(config.get('diagram', 'commentWidth', 140)),
+            placement_comment_width=int(config.get('diagram', 'commentWidth', 200)),
+            constraint_color=str(config.get('diagram', 'constraintColor', '999999')),
+            constraint_width=int(config.get('diagram', 'constraintWidth', 1)),
+            constraint_opacity=int(config.get('diagram', 'constraintOpacity', 100)),
+            foreign_key_color=str(config.get('diagram', 'foreignKeyColor', 'FF99FF')),
+            unique_color=str(config.get('diagram', 'uniqueColor', 'E6FFCC')),
+            primary_key_color=str(config.get('diagram', 'primaryKeyColor', 'FFCC99')),
+            group_table_with_comment=bool(config.get('diagram', 'groupTableWithComment', False)),
+            append_column_type=bool(config.get('diagram', 'appendColumnType', False)),
+            prepend_schema_name=bool(config.get('diagram', 'prependSchemaName', False))
+        )
+
+
+class DiagramLayer:
+    def __init__(self):
+        self.template = """<mxCell id="%s" value="%s" parent="0"/>"""
+
+    def render(self, id, name):
+        return self.template % (id, escape_value(name))
+
+
+class DiagramHeaderCell:
+    style = "swimlane;fontStyle=1;childLayout=stackLayout;horizontal=1;startSize=26;horizontalStack=0;resizeParent=1;resizeParentMax=0;resizeLast=0;collapsible=1;marginBottom=0;labelBackgroundColor=none;align=center;gradientDirection=north;swimlaneFillColor=none;gradientColor=#E6E6E6;rounded=0;swimlaneLine=1;direction=east;strokeColor=#4D4D4D;"
+
+    def __init__(self, settings):
+        self.template = '\n'.join([
+            f"""<mxCell id="%s" value="%s" style="{self.style}" vertex="1" parent="%s">""",
+            f"""<mxGeometry x="%s" y="%s" width="{settings.table_width}" height="%s" as="geometry"/>""",
+            f"""</mxCell>"""
+        ])
+
+    def render(self, parent_id, id, value, rows, x, y):
+        return self.template % (id, escape_value(value), parent_id, x, y, (rows + 1) * 26)
+
+
+class DiagramCell:
+    style = "text;align=left;verticalAlign=top;spacingLeft=4;spacingRight=4;overflow=hidden;rotatable=0;points=[[0,0.5],[1,0.5]];portConstraint=eastwest;labelBackgroundColor=none;"
+
+    def __init__(self, settings):
+        self.settings = settings
+        self.templates = {None: self.compile(None)}
+        for color in [settings.foreign_key_color, settings.unique_color, settings.primary_key_color]:
+            self.templates[color] = self.compile(color)
+
+    def compile(self, color):
+        color_style = f'fillColor=#{color};' if color else ''
+
+        return '\n'.join([
+            f"""<mxCell id="%s" value="%s" style="{self.style}{color_style}" vertex="1" parent="%s">""",
+            f"""<mxGeometry y="%s" width="{self.settings.table_width}" height="26" as="geometry"/>""",
+            f"""</mxCell>"""
+        ])
+
+    def render(self, id, value, parent, row_number, color):
+        template = self.templates.get(color)
+        if not template:
+            template = self.templates[color] = self.compile(color)
+
+        return template % (id, escape_value(value), parent, (row_number + 1) * 26)
+
+
+class DiagramConstraint:
+    def __init__(self, settings):
+        self.template = '\n'.join([
+            f"""<mxCell id="%s" source="%s" target="%s" parent="%s" style="edgeStyle=orthogonalEdgeStyle;rounded=0;orthogonalLoop=1;jettySize=auto;html=1;exit_x=%s;exitY=0.5;exitDx=0;exitDy=0;entry_x=%s;entryY=0.5;entryDx=0;entryDy=0;curved=1;strokeColor=#{settings.constraint_color};strokeWidth={settings.constraint_width};opacity={settings.constraint_opacity};" edge="1">""",
+            f"""<mxGeometry relative="1" as="geometry"/>""",
+            f"""</mxCell>"""
+        ])
+
+        # with explicit waypoints draw.io only draws the segments, nothing is routed when the file opens
+        self.template_points = '\n'.join([
+            f"""<mxCell id="%s" source="%s" target="%s" parent="%s" style="edgeStyle=none;rounded=0;html=1;exitX=%s;exitY=0.5;exitDx=0;exitDy=0;entryX=%s;entryY=0.5;entryDx=0;entryDy=0;strokeColor=#{settings.constraint_color};strokeWidth={settings.constraint_width};opacity={settings.constraint_opacity};" edge="1">""",
+            f"""<mxGeometry relative="1" as="geometry"><Array as="points">%s</Array></mxGeometry>""",
+            f"""</mxCell>"""
+        ])
+
+    def render(self, parent_id, id, source, target, entry_x, exit_x):
+        return self.template % (id, source, target, parent_id, exit_x, entry_x)
+
+    def render_points(self, parent_id, id, source, target, entry_x, exit_x, points):
+        return self.template_points % (id, source, target, parent_id, exit_x, entry_x, ''.join(f'<mxPoint x="{x}" y="{y}"/>' for x, y in points))
+
+
+class DiagramComment:
+    style = "rounded=0;whiteSpace=wrap;html=1;align=left;spacingTop=0;spacingLeft=4;fillColor=#f5f5f5;fontColor=#333333;strokeColor=#B3B3B3;"
+    style_joining = "edgeStyle=entityRelationEdgeStyle;rounded=0;orthogonalLoop=1;jettySize=auto;html=1;exit_x=0;exitY=0.5;exitDx=0;exitDy=0;fillColor=#f5f5f5;strokeColor=#B3B3B3;jumpStyle=none;elbow=vertical;entryX=1;entryY=0.5;entryDx=0;entryDy=0;exitX=0;"
+
+    def __init__(self, settings):
+        self.offset_x = settings.table_width + 40
+        self.template = '\n'.join([
+            f"""<mxCell id="%s:comment" value="%s" style="{self.style}" vertex="1" parent="%s">""",
+            f"""<mxGeometry x="%s" y="%s" width="{settings.comment_width}" height="18" as="geometry"/>""",
+            f"""</mxCell>"""
+            f"""<mxCell id="%s:comment-edge" source="%s:comment" target="%s" parent="%s" style="{self.style_joining}" edge="1">""",
+            f"""<mxGeometry relative="1" as="geometry"/>"""
+            f"""</mxCell>"""
+        ])
+
+    def render(self, parent_id, column_id, table_x, table_y, row_number, description):
+        return self.template % (column_id, escape_value(description) if description else '', parent_id, table_x + self.offset_x, table_y + (row_number + 1) * 26 + 4, column_id, column_id, column_id, parent_id)
+
+
+class DiagramGroup:
+    def __init__(self):
+        self.template = '\n'.join([
+            f"""<mxCell id="%s" value="" style="group" vertex="1" connectable="0" parent="%s">""",
+            f"""<mxGeometry x="%s" y="%s" width="%s" height="%s" as="geometry" />""",
+            f"""</mxCell>"""
+        ])
+
+    def render(self, parent_id, group_id, x, y, width, height):
+        return self.template % (group_id, parent_id, x, y, width, height)
+
+
+class DiagramPageLink:
+    style = "rounded=1;whiteSpace=wrap;html=1;dashed=1;fontSize=10;fillColor=#FFFFFF;strokeColor=#999999;fontColor=#333333;"
+
+    def __init__(self):
+        self.template = '\n'.join([
+            f"""<UserObject id="%s" label="%s" link="data:page/id,%s">""",
+            f"""<mxCell style="{self.style}" vertex="1" parent="%s">""",
+            f"""<mxGeometry x="%s" y="%s" width="100" height="20" as="geometry"/>""",
+            f"""</mxCell>""",
+            f"""</UserObject>"""
+        ])
+
+    def render(self, parent_id, id, label, page_id, x, y):
+        return self.template % (id, escape_value(label), page_id, parent_id, x, y)
+
+
+class DiagramRenderer:
+    def __init__(self, settings):
+        self.settings = settings
+        self.layer = DiagramLayer()
+        self.header = DiagramHeaderCell(settings)
+        self.cell = DiagramCell(settings)
+        self.constraint = DiagramConstraint(settings)
+        self.comment = DiagramComment(settings)
+        self.group = DiagramGroup()
+        self.page_link = DiagramPageLink()
@@ -0,0 +1,280 @@
+import io
+import os
+import sys
+import copy
+import json
+import hashlib
+import threading
+import http.server
+import urllib.parse
+import collections
+
+from .api import write_diagram
+from .batch import get_batch_configs
+from .config import DiagramError, ExtConfig
+from .layers import layer_types
+from .stats import RunStats
+
+
+class DiagramCache:
+    def __init__(self, size):
+        self.size = size
+        self.entries = collections.OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            value = self.entries.get(key)
+            if value is not None:
+                self.entries.move_to_end(key)
+
+            return value
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+
+class LayerPool:
+    def __init__(self, config, size):
+        self.config = config
+        self.size = size
+        self.created = 0
+        self.idle = []
+        self.condition = threading.Condition()
+
+    def acquire(self):
+        # waits for an idle layer or a free slot, a discarded layer frees its slot
+        with self.condition:
+            while not self.idle and self.created >= self.size:
+                self.condition.wait()
+
+            if self.idle:
+                return self.idle.pop()
+
+            self.created = self.created + 1
+
+        try:
+            database = self.config['database']
+            return layer_types[database['type']](database['dsn'], self.config)
+        except Exception:
+            self.discard()
+            raise
+
+    def release(self, layer):
+        with self.condition:
+            self.idle.append(layer)
+            self.condition.notify()
+
+    def discard(self, layer=None):
+        if layer is not None:
+            layer.close()
+
+        with self.condition:
+            self.created = self.created - 1
+            self.condition.notify()
+
+
+class DiagramService:
+    parameters = {
+        'schema': ('structure', 'schema'),
+        'table': ('structure', 'table'),
+        'focus': ('structure', 'focus'),
+        'depth': ('structure', 'focusDepth'),
+        'direction': ('structure', 'focusDirection'),
+        'layout': ('diagram', 'layout'),
+        'pages': ('diagram', 'pages'),
+        'compressed': ('diagram', 'compressed')
+    }
+    choices = {
+        'direction': ['both', 'parents', 'children'],
+        'layout': ['columns', 'layered'],
+        'pages': ['', 'schema', 'component']
+    }
+
+    def __init__(self, databases, cache_size, pool_size):
+        self.databases = collections.OrderedDict((name, config) for name, config in databases)
+        self.pools = {name: LayerPool(config, pool_size) for name, config in self.databases.items()}
+        self.cache = DiagramCache(cache_size)
+
+    def get_names(self):
+        return list(self.databases)
+
+    def get_config(self, name, query):
+        config = copy.deepcopy(self.databases[name])
+        for key, values in query.items():
+            if not key in self.parameters:
+                raise ValueError(f'Unknown parameter "{key}"')
+
+            value = values[-1]
+            if key in self.choices and not value in self.choices[key]:
+                raise ValueError(f'Wrong value for parameter "{key}"')
+
+            if key == 'depth':
+                value = int(value)
+            elif key == 'compressed':
+                value = value.lower() in ['1', 'true', 'yes']
+
+            section, config_key = self.parameters[key]
+            config[section] = dict(config.get(section) or {})
+            config[section][config_key] = value
+
+        return config
+
+    def get_diagram(self, name, query):
+        config = self.get_config(name, query)
+        settings = {key: config.get(key) for key in ['structure', 'diagram', 'descriptions']}
+        description_store = ExtConfig(config).get('structure', 'descriptionStore', None)
+        if description_store and os.path.isfile(str(description_store)):
+            # edits in the description store do not change the catalog fingerprint
+            settings['descriptionStore'] = os.stat(str(description_store)).st_mtime_ns
+        config_hash = hashlib.md5(json.dumps(settings, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+        compressed = bool(ExtConfig(config).get('diagram', 'compressed', False))
+
+        pool = self.pools[name]
+        layer = pool.acquire()
+        try:
+            if not layer.is_connected():
+                layer.connect()
+
+            layer.set_config(config)
+            fingerprint = layer.get_fingerprint()
+            key = (name, fingerprint, config_hash)
+
+            diagram = self.cache.get(key) if fingerprint else None
+            if diagram is not None:
+                pool.release(layer)
+                return diagram, hashlib.md5(repr(key).encode('utf-8')).hexdigest(), True
+
+            layer.reset(fingerprint)
+            layer.get_table_structure()
+            layer.get_constraints()
+
+            stream = io.StringIO()
+            write_diagram(layer, stream, compressed, RunStats())
+            diagram = stream.getvalue().encode('utf-8')
+        except Exception:
+            pool.discard(layer)
+            raise
+
+        # the layer keeps only its connection between requests
+        layer.reset()
+        pool.release(layer)
+
+        if fingerprint:
+            self.cache.put(key, diagram)
+
+        return diagram, hashlib.md5(repr(key).encode('utf-8')).hexdigest(), False
+
+
+class DiagramRequestHandler(http.server.BaseHTTPRequestHandler):
+    service = None
+    verbose = False
+
+    def do_GET(self):
+        url = urllib.parse.urlsplit(self.path)
+        path = [urllib.parse.unquote(x) for x in url.path.split('/') if x]
+
+        if path == ['health']:
+            self.send_body(200, 'application/json', b'{"status": "ok"}')
+            return
+
+        if path == ['databases']:
+            self.send_body(200, 'application/json', json.dumps(self.service.get_names()).encode('utf-8'))
+            return
+
+        if not path or path[0] != 'diagram' or len(path) > 2:
+            self.send_error_json(404, 'Not found')
+            return
+
+        names = self.service.get_names()
+        name = path[1] if len(path) == 2 else names[0]
+        if not name in names:
+            self.send_error_json(404, f'Unknown database "{name}"')
+            return
+
+        try:
+            diagram, etag, cached = self.service.get_diagram(name, urllib.parse.parse_qs(url.query, keep_blank_values=True))
+        except ValueError as e:
+            self.send_error_json(400, str(e))
+            return
+        except Exception as e:
+            self.send_error_json(500, str(e).strip())
+            return
+
+        etag = f'"{etag}"'
+        if self.headers.get('If-None-Match') == etag:
+            self.send_body(304, None, b'', {'ETag': etag})
+            return
+
+        self.send_body(200, 'application/xml; charset=utf-8', diagram, {'ETag': etag, 'X-Cache': 'hit' if cached else 'miss'})
+
+    def send_error_json(self, code, message):
+        self.send_body(code, 'application/json', json.dumps({'error': message}).encode('utf-8'))
+
+    def send_body(self, code, content_type, body, headers=None):
+        self.send_response(code)
+        if content_type:
+            self.send_header('Content-Type', content_type)
+
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.verbose:
+            super().log_message(format, *args)
+
+
+def make_server(args, config):
+    server = ExtConfig(config)
+    host = str(server.get('server', 'host', '127.0.0.1'))
+    port = int(server.get('server', 'port', 8080))
+    if args.serve:
+        address = str(args.serve)
+        if ':' in address:
+            host, address = address.rsplit(':', 1)
+
+        port = int(address)
+
+    if 'databases' in config:
+        databases = [(name, database_config) for name, output, database_config in get_batch_configs(config)]
+    else:
+        databases = [('default', {key: value for key, value in config.items() if key != 'server'})]
+
+    for name, database_config in databases:
+        database = database_config.get('database') or {}
+        if not database.get('dsn') or not database.get('type') in layer_types:
+            raise DiagramError(f'Missing or wrong "dsn"/"type" for database "{name}"')
+
+    handler = type('Handler', (DiagramRequestHandler,), {
+        'service': DiagramService(databases, int(server.get('server', 'cacheSize', 32)), int(server.get('server', 'poolSize', 4))),
+        'verbose': args.verbose
+    })
+
+    httpd = http.server.ThreadingHTTPServer((host, port), handler)
+    httpd.daemon_threads = True
+    return httpd
+
+
+def serve(args, config):
+    httpd = make_server(args, config)
+
+    # port 0 binds a free port, the real one is printed
+    host, port = httpd.server_address[:2]
+    sys.stdout.write(f'Serving diagrams of {", ".join(httpd.RequestHandlerClass.service.get_names())} on http://{host}:{port}/\n')
+    sys.stdout.flush()
+
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
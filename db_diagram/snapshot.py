@@ -0,0 +1,186 @@
+import os
+import json
+import hashlib
+import contextlib
+import urllib.parse
+
+from .config import DiagramError
+from .writer import atomic_output
+
+
+class SnapshotCache:
+    batch_size = 1000
+    # bumped whenever the cached row format or the queries producing it change
+    version = 2
+
+    def __init__(self, directory, key, fingerprint):
+        self.directory = directory
+        self.key = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        self.fingerprint = fingerprint
+
+    def get_path(self, kind):
+        return os.path.join(self.directory, f'{self.key}.{kind}.jsonl')
+
+    def load(self, kind):
+        try:
+            snapshot_file = open(self.get_path(kind), 'r', encoding='utf-8')
+        except OSError:
+            return None
+
+        try:
+            header = json.loads(snapshot_file.readline() or 'null')
+        except ValueError:
+            header = None
+
+        if not isinstance(header, dict) or header.get('fingerprint') != self.fingerprint or header.get('version') != self.version:
+            snapshot_file.close()
+            return None
+
+        return self.read_rows(snapshot_file)
+
+    def read_rows(self, snapshot_file):
+        with snapshot_file:
+            for line in snapshot_file:
+                for row in json.loads(line):
+                    yield row
+
+    def store(self, kind, rows):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.get_path(kind)
+        # unfinished cache files (errors, abandoned generators) are not left behind
+        with atomic_output(path) as snapshot_file:
+            snapshot_file.write(json.dumps({'fingerprint': self.fingerprint, 'version': self.version}) + '\n')
+
+            batch = []
+            for row in rows:
+                if isinstance(row, dict):
+                    row = tuple(row.values())
+
+                batch.append(row)
+                if len(batch) >= self.batch_size:
+                    snapshot_file.write(json.dumps(batch) + '\n')
+                    batch = []
+
+                yield row
+
+            if batch:
+                snapshot_file.write(json.dumps(batch) + '\n')
+
+
+class DescriptionStore:
+    def __init__(self, path):
+        self.path = path
+
+    def load(self, schemas, table_filter):
+        if not os.path.isfile(self.path):
+            return {}
+
+        # imported on first use, only configs with a description store need it
+        import sqlite3
+
+        try:
+            with contextlib.closing(sqlite3.connect(f'file:{urllib.parse.quote(self.path)}?mode=ro', uri=True)) as connection:
+                # a store that was never merged into has no table yet
+                if connection.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'descriptions'").fetchone() is None:
+                    return {}
+
+                # the schemas are a prefix of the primary key, the table filter (regular
+                # expressions) is checked for every row of these schemas
+                connection.create_function('db_diagram_table', 1, table_filter, deterministic=True)
+                rows = connection.execute(f"""
+                    SELECT schema_name, table_name, column_name, description
+                    FROM descriptions
+                    WHERE schema_name IN ({', '.join('?' * len(schemas))})
+                        AND db_diagram_table(table_name)
+                """, list(schemas))
+
+                return {f'{schema_name}.{table_name}.{column_name}': description for schema_name, table_name, column_name, description in rows}
+        except sqlite3.Error as e:
+            raise DiagramError(f'Description store {self.path}: {str(e).strip()}')
+
+    def merge(self, entries):
+        import sqlite3
+
+        # existing descriptions are kept, only new columns are added
+        try:
+            with contextlib.closing(sqlite3.connect(self.path)) as connection:
+                with connection:
+                    connection.execute("""
+                        CREATE TABLE IF NOT EXISTS descriptions (
+                            schema_name TEXT NOT NULL,
+                            table_name TEXT NOT NULL,
+                            column_name TEXT NOT NULL,
+                            description TEXT,
+                            PRIMARY KEY (schema_name, table_name, column_name)
+                        ) WITHOUT ROWID
+                    """)
+                    cursor = connection.executemany("INSERT OR IGNORE INTO descriptions VALUES (?, ?, ?, ?)", entries)
+                    return cursor.rowcount
+        except sqlite3.Error as e:
+            raise DiagramError(f'Description store {self.path}: {str(e).strip()}')
+
+
+def get_row_values(row):
+    if isinstance(row, dict):
+        return tuple(row.values())
+
+    return tuple(row)
+
+
+def get_msgpack():
+    try:
+        import msgpack
+    except ImportError:
+        raise DiagramError('Python library msgpack is required for msgpack snapshots')
+
+    return msgpack
+
+
+def write_snapshot(path, snapshot):
+    header = {'format': 'db-diagram-snapshot', 'version': 1}
+
+    if path.endswith('.msgpack'):
+        msgpack = get_msgpack()
+
+    with atomic_output(path, 'wb') as f:
+        if path.endswith('.msgpack'):
+            packer = msgpack.Packer()
+            f.write(packer.pack(header))
+            for kind in ['columns', 'constraints']:
+                for row in snapshot[kind]:
+                    f.write(packer.pack((kind,) + tuple(row)))
+        else:
+            f.write(json.dumps(header).encode('utf-8') + b'\n')
+            for kind in ['columns', 'constraints']:
+                for row in snapshot[kind]:
+                    f.write(json.dumps((kind,) + tuple(row), separators=(',', ':'), default=str).encode('utf-8') + b'\n')
+
+
+def read_snapshot(path, kind):
+    try:
+        f = open(path, 'rb')
+    except OSError as e:
+        raise DiagramError(f'Snapshot {path}: {e.strerror}')
+
+    with f:
+        # broken files fail while reading, not only on the header
+        errors = (ValueError, TypeError, IndexError)
+        try:
+            if f.peek(1)[:1] == b'{':
+                header = json.loads(f.readline())
+                rows = (json.loads(line) for line in f if line.startswith(b'["' + kind.encode('utf-8') + b'",'))
+
+            else:
+                msgpack = get_msgpack()
+                errors = errors + (msgpack.UnpackException,)
+                unpacker = msgpack.Unpacker(f, raw=False)
+                header = next(unpacker, None)
+                rows = (row for row in unpacker if row[0] == kind)
+
+            if not isinstance(header, dict) or header.get('format') != 'db-diagram-snapshot':
+                raise DiagramError(f'File "{path}" is not a db-diagram snapshot')
+
+            for row in rows:
+                yield tuple(row[1:])
+        except errors as e:
+            raise DiagramError(f'Snapshot {path}: {str(e).strip() or type(e).__name__}')
@@ -0,0 +1,95 @@
+import sys
+import json
+import time
+import cProfile
+import collections
+import contextlib
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+class RunStats:
+    def __init__(self):
+        self.phases = collections.OrderedDict()
+        self.rows = collections.OrderedDict()
+        self.fetch = collections.OrderedDict()
+        self.counts = {}
+        self.profiler = None
+
+    def enable_profile(self):
+        self.profiler = cProfile.Profile()
+
+    @contextlib.contextmanager
+    def measure(self, phase, profile=False):
+        profile = profile and self.profiler
+        start = time.perf_counter()
+        if profile:
+            self.profiler.enable()
+
+        try:
+            yield
+        finally:
+            if profile:
+                self.profiler.disable()
+
+            self.phases[phase] = self.phases.get(phase, 0) + time.perf_counter() - start
+
+    def count_rows(self, kind, rows):
+        # time spent inside the row source (query, cache, file parser), the rest is ingestion
+        count = 0
+        fetch = 0
+        iterator = iter(rows)
+        while True:
+            start = time.perf_counter()
+            row = next(iterator, None)
+            fetch = fetch + time.perf_counter() - start
+            if row is None:
+                break
+
+            count = count + 1
+            yield row
+
+        self.rows[kind] = count
+        self.fetch[kind] = fetch
+
+    def get_peak_rss(self):
+        if resource is None:
+            return None
+
+        peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+        # kilobytes on Linux, bytes on macOS
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+    def to_dict(self):
+        return {
+            'phases': self.phases,
+            'rows': self.rows,
+            'fetch': self.fetch,
+            'counts': self.counts,
+            'peak_rss': self.get_peak_rss()
+        }
+
+    def write_report(self, stream):
+        for phase, seconds in self.phases.items():
+            stream.write(f'{phase:<12} {seconds:>9.3f} s\n')
+            if phase in self.rows:
+                stream.write(f'{"":<12} {self.rows[phase]:>9} rows, {self.fetch[phase]:.3f} s reading\n')
+
+        for key, value in self.counts.items():
+            stream.write(f'{key:<12} {value:>9}\n')
+
+        peak = self.get_peak_rss()
+        if peak is not None:
+            stream.write(f'{"peak rss":<12} {peak / 1048576:>9.1f} MB\n')
+
+    def write_json(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+            f.write('\n')
+
+    def write_profile(self, path):
+        if self.profiler:
+            self.profiler.dump_stats(path)
@@ -0,0 +1,942 @@
+import io
+import re
+import sys
+import math
+import bisect
+import itertools
+import threading
+import collections
+import concurrent.futures
+import multiprocessing
+
+from .config import DiagramError
+from .graph import FKGraph
+from .layout import LayoutTable, ColumnLayout, ColumnSpans, LayeredLayout, walk_focus, get_component_spec, layout_component
+from .render import DiagramSettings, DiagramRenderer
+from .snapshot import DescriptionStore
+from .writer import make_id, quote_id, DiagramPageWriter, CompressedDiagramWriter
+
+
+column_flags = {
+    'PRIMARY KEY': 1,
+    'FOREIGN KEY': 2,
+    'UNIQUE': 4
+}
+
+
+class DBColumn:
+    __slots__ = ('table', 'name', 'udt_name', 'position', 'description', 'flags', 'row')
+
+    def __init__(self, table, name, udt_name, position, description, row):
+        self.table = table
+        self.name = name
+        self.udt_name = udt_name
+        self.position = position
+        self.description = description
+        self.flags = 0
+        self.row = row
+
+    @property
+    def id(self):
+        return self.table.column_prefix + quote_id(self.name)
+
+    def get_path(self):
+        return f'{self.table.schema}.{self.table.name}.{self.name}'
+
+
+class DBTable(LayoutTable):
+    def __init__(self, renderer, parent_id, id, group_id, schema, name, show_comments):
+        super().__init__()
+        self.renderer = renderer
+        self.parent_id = parent_id
+        self.group_id = group_id
+        self.id = id
+        self.column_prefix = make_id('column', schema, name) + '.'
+        self.schema = schema
+        self.name = name
+        self.show_comments = show_comments
+        self.columns = []
+        self.columns_index = {}
+
+    def get_id(self):
+        return self.id
+
+    def get_schema(self):
+        return self.schema
+
+    def get_name(self):
+        return self.name
+
+    def get_column_counts(self):
+        return len(self.columns)
+
+    def get_column_ids(self):
+        return [column.id for column in self.columns]
+
+    def get_column_names(self):
+        return [column.name for column in self.columns]
+
+    def add_column(self, name, udt_name, position, description):
+        # names and types repeat across tables, interned strings are stored once
+        name = sys.intern(name)
+        column = DBColumn(self, name, sys.intern(udt_name) if udt_name else udt_name, position, description, len(self.columns))
+        self.columns.append(column)
+        self.columns_index[name] = column
+        return column
+
+    def get_column_entry(self, name):
+        return self.columns_index.get(name)
+
+    def set_column_type(self, name, type):
+        column = self.columns_index.get(name)
+        if column:
+            column.flags = column.flags | column_flags.get(type, 0)
+
+    def __str__(self):
+        if not len(self.columns):
+            return ''
+
+        renderer = self.renderer
+        settings = renderer.settings
+        diagram = []
+        table_name = self.name
+        if settings.prepend_schema_name:
+            table_name = f'{self.schema}.{self.name}'
+
+        parent_id = self.parent_id
+        x = self.x
+        y = self.y
+
+        if settings.group_table_with_comment:
+            width = settings.table_width
+            height = (len(self.columns) + 1) * 26
+
+            if self.show_comments:
+                width = width + settings.comment_width + 40
+
+            diagram.append(renderer.group.render(parent_id, self.group_id, x, y, width, height))
+            parent_id = self.group_id
+            x = 0
+            y = 0
+
+        diagram.append(renderer.header.render(parent_id, self.id, table_name, len(self.columns), x, y))
+
+        render_cell = renderer.cell.render
+        render_comment = renderer.comment.render
+
+        column_prefix = self.column_prefix
+
+        row_number = 0
+        for column in self.columns:
+            column_id = column_prefix + quote_id(column.name)
+            column_name = column.name
+            if settings.append_column_type:
+                column_name = f'{column_name} [{column.udt_name}]'
+
+            color = None
+            flags = column.flags
+
+            if flags:
+                if flags & 2:
+                    column_name = f'[FK] {column_name}'
+                    color = settings.foreign_key_color
+
+                if flags & 4:
+                    column_name = f'[U] {column_name}'
+                    color = settings.unique_color
+
+                if flags & 1:
+                    column_name = f'[PK] {column_name}'
+                    color = settings.primary_key_color
+
+            diagram.append(render_cell(column_id, column_name, self.id, row_number, color))
+
+            if self.show_comments:
+                diagram.append(render_comment(parent_id, column_id, x, y, row_number, column.description))
+
+            row_number = row_number + 1
+
+        return ('\n'.join(diagram))
+
+
+class DBStructure:
+    def __init__(self, config):
+        self.config = config
+        self.settings = DiagramSettings.from_config(config)
+        self.renderer = DiagramRenderer(self.settings)
+        self.tables = []
+        self.tables_index = {}
+        self.layers = {}
+        self.x = 100
+        self.y = 100
+        self.column_offset = 0
+        self.column_count = 0
+        self.connections = []
+        self.connection_ids = set()
+        self.connection_keys = set()
+        self.graph = None
+        self.previous_diagram = None
+        self.use_layers = bool(config.get('diagram', 'layers', False))
+        self.add_comment = bool(config.get('diagram', 'addColumnComment', False))
+        self.column_center = int(config.get('diagram', 'columnCenter', 1000))
+        self.column_max_height = int(config.get('diagram', 'columnMaxHeight', 1000))
+        self.child_offset_fix = bool(config.get('diagram', 'childOffsetFix', False))
+        self.child_priority_fix = bool(config.get('diagram', 'childPriorityFix', False))
+        self.parent_priority_fix = bool(config.get('diagram', 'parentPriorityFix', False))
+        self.change_placement_direction = bool(config.get('diagram', 'changePlacementDirection', True))
+        self.layout = str(config.get('diagram', 'layout', 'columns'))
+        self.layered_iterations = int(config.get('diagram', 'layeredIterations', 4))
+        self.layered_ordering = str(config.get('diagram', 'layeredOrdering', 'barycenter'))
+        self.layered_max_height = int(config.get('diagram', 'layeredMaxHeight', 0))
+        self.split_components = bool(config.get('diagram', 'splitComponents', False))
+        self.constraint_edges = str(config.get('diagram', 'constraintEdges', 'column'))
+        self.edge_waypoints = bool(config.get('diagram', 'edgeWaypoints', False))
+        self.edge_channels = {}
+        self.edge_spans = None
+        self.workers = int(config.get('diagram', 'workers', 0))
+        self.parallel_threshold = int(config.get('diagram', 'parallelThreshold', 2000))
+        self.singles_per_block = 50
+        self.page_mode = str(config.get('diagram', 'pages', '') or '')
+        if not self.page_mode in ['', 'schema', 'component']:
+            raise DiagramError('Wrong value for "diagram.pages" key in config file')
+        self.page_tables = int(config.get('diagram', 'pageTables', 100))
+        self.page_list = []
+        self.schema_filter = [x.strip() for x in str(self.config.get('structure', 'schema', '')).split(',')]
+        self.table_filter_patterns = [x.strip() for x in str(self.config.get('structure', 'table', '')).split(',')]
+        self.table_filter = [re.compile(x) for x in self.table_filter_patterns]
+        self.table_filter_cache = {}
+        self.focus = [x.strip() for x in str(self.config.get('structure', 'focus', '') or '').split(',') if x.strip()]
+        self.focus_depth = int(self.config.get('structure', 'focusDepth', 1))
+        self.focus_direction = str(self.config.get('structure', 'focusDirection', 'both'))
+        self.focus_applied = False
+        if not self.use_layers:
+            self.layers['main'] = make_id('layer', 'main')
+
+        # only descriptions from config and the description store, the others stay on the columns
+        self.descriptions = {}
+        description_items = self.config.items('descriptions')
+        for path, description in description_items.items():
+            self.descriptions[path] = description
+
+        self.description_store = self.config.get('structure', 'descriptionStore', None)
+        if self.description_store:
+            for path, description in DescriptionStore(str(self.description_store)).load(self.schema_filter, self.check_table_filter).items():
+                self.descriptions.setdefault(path, description)
+
+    def get_edge_id(self, *names):
+        id = make_id('edge', *names)
+        suffix = 1
+        while id in self.connection_ids:
+            suffix = suffix + 1
+            id = make_id('edge', *names, str(suffix))
+
+        self.connection_ids.add(id)
+        return id
+
+    def set_previous_diagram(self, previous_diagram):
+        self.previous_diagram = previous_diagram
+
+    def find_table(self, schema, name):
+        return self.tables_index.get((schema, name))
+
+    def get_table(self, schema, name):
+        table = self.tables_index.get((schema, name))
+        if table:
+            return table
+
+        if self.use_layers:
+            if not schema in self.layers:
+                self.layers[schema] = make_id('layer', 'schema', schema)
+
+            parent_id = self.layers[schema]
+
+        else:
+            parent_id = self.layers['main']
+
+        table = DBTable(self.renderer, parent_id, make_id('table', schema, name), make_id('group', schema, name), schema, name, self.add_comment)
+        self.tables.append(table)
+        self.tables_index[(schema, name)] = table
+
+        return table
+
+    def set_column_description(self, schema_name, table_name, column_name, description):
+        if f"{schema_name}.{table_name}.{column_name}" in self.descriptions:
+            return
+
+        column = self.get_structure_entry(schema_name, table_name, column_name)
+        if column:
+            column.description = description
+
+    def get_structure_entry(self, schema, table, column):
+        table = self.tables_index.get((schema, table))
+        if table:
+            return table.columns_index.get(column)
+
+        return None
+
+    def get_schema_filter(self):
+        return self.schema_filter
+
+    def get_focus(self):
+        return self.focus
+
+    def get_focus_keys(self):
+        keys = []
+        for name in self.focus:
+            if '.' in name:
+                keys.append(tuple(name.split('.', 1)))
+            else:
+                keys.extend((schema, name) for schema in self.schema_filter)
+
+        return keys
+
+    def build_graph(self):
+        # called once all constraints are read; links, priorities and components of tables
+        # come from the deduplicated graph, focus and pages only narrow the links later
+        self.graph = FKGraph(self.tables, self.connections)
+        for table in self.tables:
+            table.set_childs(self.graph.get_childs(table))
+            table.set_parents(self.graph.get_parents(table))
+            table.priority = self.graph.get_priority(table)
+            table.component = self.graph.get_component(table)
+
+    def get_graph(self):
+        return self.graph
+
+    def apply_focus(self):
+        if not self.focus or self.focus_applied:
+            return
+
+        self.focus_applied = True
+        start = [table for table in (self.find_table(*key) for key in self.get_focus_keys()) if table]
+        if not start:
+            raise DiagramError(f'Focus table(s) {", ".join(self.focus)} not found')
+
+        keep = walk_focus(start, self.focus_depth, self.focus_direction, LayoutTable.get_childs, LayoutTable.get_parents)
+
+        self.tables = [table for table in self.tables if table in keep]
+        self.tables_index = {key: table for key, table in self.tables_index.items() if table in keep}
+        for table in self.tables:
+            table.set_childs([x for x in table.get_childs() if x in keep])
+            table.set_parents([x for x in table.get_parents() if x in keep])
+
+        self.connections = [connection for connection in self.connections if connection['source'].table in keep and connection['target'].table in keep]
+
+    def get_table_filter(self):
+        return self.table_filter_patterns
+
+    def check_table_filter(self, table_name):
+        if table_name in self.table_filter_cache:
+            return self.table_filter_cache[table_name]
+
+        matched = not len(self.table_filter)
+        for tf in self.table_filter:
+            if tf.match(table_name):
+                matched = True
+                break
+
+        self.table_filter_cache[table_name] = matched
+        return matched
+
+    def get_descriptions(self):
+        # config entries keep their order, the column paths follow
+        descriptions = dict(self.descriptions)
+        for table in self.tables:
+            for column in table.columns:
+                path = column.get_path()
+                if path not in descriptions:
+                    descriptions[path] = column.description
+
+        return descriptions
+
+    def get_description_entries(self):
+        for table in self.tables:
+            for column in table.columns:
+                yield (table.schema, table.name, column.name, column.description)
+
+    def add_table_entry(self, data):
+        if isinstance(data, dict):
+            self.add_column_entry(
+                data.get('table_schema', ''),
+                data.get('table_name', ''),
+                data.get('column_name', ''),
+                data.get('udt_name', ''),
+                data.get('ordinal_position', ''),
+                data.get('description', '')
+            )
+
+        elif isinstance(data, (tuple, list)):
+            self.add_column_entry(*data)
+
+    def add_column_entry(self, schema_name, table_name, column_name, udt_name, position, description):
+        if not schema_name in self.schema_filter:
+            return
+
+        if not self.check_table_filter(table_name):
+            return
+
+        if self.descriptions:
+            description = self.descriptions.get(f"{schema_name}.{table_name}.{column_name}", description)
+
+        if not description:
+            description = ''
+
+        table = self.get_table(schema_name, table_name)
+        if table:
+            table.add_column(column_name, udt_name, position, description)
+            self.column_count = self.column_count + 1
+
+    def add_constraint(self, data):
+        if isinstance(data, dict):
+            self.add_constraint_entry(
+                data.get('constraint_type'),
+                data.get('table_schema'),
+                data.get('constraint_name'),
+                data.get('table_name'),
+                data.get('column_name'),
+                data.get('foreign_table_schema'),
+                data.get('foreign_table_name'),
+                data.get('foreign_column_name')
+            )
+
+        elif isinstance(data, (tuple, list)):
+            self.add_constraint_entry(*data)
+
+    def add_constraint_entry(self, constraint_type, table_schema, constraint_name, table_name, column_name, foreign_table_schema, foreign_table_name, foreign_column_name):
+        if not table_schema in self.schema_filter:
+            return
+
+        if not foreign_table_schema in self.schema_filter:
+            return
+
+        if not self.check_table_filter(table_name):
+            return
+
+        if not self.check_table_filter(foreign_table_name):
+            return
+
+        if self.use_layers:
+            if not 'constraints' in self.layers:
+                self.layers['constraints'] = make_id('layer', 'constraints')
+
+            parent_id = self.layers['constraints']
+
+        else:
+            parent_id = self.layers['main']
+
+        table = self.get_table(table_schema, table_name)
+        if table:
+            table.set_column_type(column_name, constraint_type)
+
+        if constraint_type == 'FOREIGN KEY':
+            source = self.get_structure_entry(table_schema, table_name, column_name)
+            target = self.get_structure_entry(foreign_table_schema, foreign_table_name, foreign_column_name)
+
+            if not source or not target:
+                return
+
+            # one edge per column pair or per constraint, repeated rows are ignored; the resolved
+            # columns already identify schema, table and column
+            if self.constraint_edges == 'constraint':
+                key = (source.table, constraint_name)
+            else:
+                key = (source, target, constraint_name)
+
+            if key in self.connection_keys:
+                return
+
+            self.connection_keys.add(key)
+            self.connections.append({
+                'parent_id': parent_id,
+                'id': self.get_edge_id(table_schema, table_name, column_name, foreign_table_schema, foreign_table_name, foreign_column_name),
+                'source': source,
+                'target': target
+            })
+
+    def add_diagram_constraint(self, diagram, constraint):
+        source = constraint['source']
+        target = constraint['target']
+        parent_id = constraint['parent_id']
+        id = constraint['id']
+
+        if source and target:
+            source_id = source.id
+            target_id = target.id
+
+            source_table = self.find_table(source.table.schema, source.table.name)
+            target_table = self.find_table(target.table.schema, target.table.name)
+
+            if self.edge_waypoints and source_table and target_table:
+                diagram.append(self.get_edge_route(parent_id, id, source, target, source_table, target_table))
+                return
+
+            if source_table and target_table:
+                source_column = source_table.get_column()
+                target_column = target_table.get_column()
+
+                if source_column == target_column:
+                    entry_x = 0
+                    exit_x = 0
+
+                elif source_column > target_column:
+                    entry_x = 1
+                    exit_x = 0
+
+                else:
+                    entry_x = 0
+                    exit_x = 1
+
+            diagram.append(self.renderer.constraint.render(parent_id, id, source_id, target_id, entry_x, exit_x))
+
+    def set_edge_routes(self, placed):
+        # waypoints avoid the tables of the rendered diagram or page
+        self.edge_channels = {}
+        self.edge_spans = None
+        if not self.edge_waypoints:
+            return
+
+        columns = collections.defaultdict(list)
+        for table in placed:
+            columns[table.x].append((table.y, table.y + (table.get_column_counts() + 1) * 26))
+
+        # gutters narrower than a lane are treated as taken
+        self.edge_spans = ColumnSpans(sorted(columns.items()), 12)
+
+    def get_edge_extent(self):
+        # tables and their comment cells
+        extent = self.settings.table_width
+        if self.add_comment:
+            extent = extent + self.settings.comment_width + 40
+
+        return extent
+
+    def get_edge_lane(self, table, side):
+        # one pool of lanes per gap between columns, shared by the tables on both sides of it;
+        # when the gap is full, lanes are shared instead of spilling into the tables
+        extent = self.get_edge_extent()
+        gap = self.get_column_width() - extent
+        gap_x = table.x + extent if side else table.x - gap
+
+        lanes = self.edge_channels.setdefault(gap_x, {})
+        lane = lanes.setdefault(table, len(lanes))
+        lane_count = max(1, (gap - 20) // 8)
+        return gap_x + 10 + (lane % lane_count) * 8
+
+    def get_edge_port(self, table, row, side, lane_x):
+        # points from a column row to its lane, comment cells right of the table are passed
+        # at the border between two rows
+        y = table.y + row * 26 + 39
+        if side and self.add_comment:
+            x = table.x + self.settings.table_width + 20
+            border = table.y + (row + 1) * 26
+            return [(x, y), (x, border), (lane_x, border)]
+
+        return [(lane_x, y)]
+
+    def get_edge_run(self, source_y, target_y, start_x, end_x):
+        # horizontal segment between two lanes, kept in a gutter free of tables of every crossed column
+        blocked = self.edge_spans.get_spans(*self.edge_spans.get_range(min(start_x, end_x) - self.get_edge_extent(), max(start_x, end_x)))
+        if not blocked:
+            return source_y
+
+        def is_free(y):
+            i = bisect.bisect_right(blocked, (y, math.inf)) - 1
+            return i < 0 or y > blocked[i][1] + 6
+
+        candidates = [y for y in (source_y, target_y) if is_free(y) and is_free(y + 6)]
+        candidates.append(blocked[0][0] - 26)
+        candidates.append(blocked[-1][1] + 26)
+        for (top, bottom), (next_top, next_bottom) in zip(blocked, blocked[1:]):
+            candidates.append((bottom + next_top) // 2)
+
+        return min(candidates, key=lambda y: (abs(y - source_y) + abs(y - target_y), abs(y - source_y)))
+
+    def get_edge_route(self, parent_id, id, source, target, source_table, target_table):
+        # sides are picked from the placed positions, tables in one column are joined on the left
+        if abs(source_table.x - target_table.x) < self.settings.table_width:
+            entry_x = 0
+            exit_x = 0
+        elif source_table.x > target_table.x:
+            entry_x = 1
+            exit_x = 0
+        else:
+            entry_x = 0
+            exit_x = 1
+
+        # vertical segments run in lanes of the gaps next to both tables
+        source_x = self.get_edge_lane(source_table, exit_x)
+        target_x = self.get_edge_lane(target_table, entry_x)
+        source_points = self.get_edge_port(source_table, source.row, exit_x, source_x)
+        target_points = self.get_edge_port(target_table, target.row, entry_x, target_x)[::-1]
+
+        run_y = self.get_edge_run(source_points[-1][1], target_points[0][1], source_x, target_x)
+        points = []
+        for point in source_points + [(source_x, run_y), (target_x, run_y)] + target_points:
+            if not points or points[-1] != point:
+                points.append(point)
+
+        return self.renderer.constraint.render_points(parent_id, id, source.id, target.id, entry_x, exit_x, points)
+
+    def get_link_route(self, connection, table, stub_x, stub_row):
+        # from the column row to the stub on the right side of the table
+        source_x = stub_x - 10
+        points = self.get_edge_port(table, connection['source'].row, 1, source_x)
+        points.append((source_x, table.y + stub_row * 26 + 39))
+        return points
+
+    def get_column_width(self):
+        table_width = self.settings.table_width + 140
+        if self.add_comment:
+            table_width = table_width + self.settings.placement_comment_width + 40
+
+        return table_width
+
+    def add_previous_tables(self):
+        column_width = self.get_column_width()
+        last_column = None
+
+        for table in self.tables:
+            previous = self.previous_diagram.get_table(table.get_id())
+            if not previous or previous['columns'] != table.get_column_ids():
+                continue
+
+            column = int(round((previous['x'] - self.x) / column_width))
+            table.set_used_in_diagram()
+            table.set_position(previous['x'], previous['y'])
+            table.set_column(column)
+
+            if last_column is None or column > last_column:
+                last_column = column
+
+        if last_column is not None:
+            self.column_offset = last_column + 1
+
+    def to_diagram(self):
+        diagram = []
+        self.write_diagram(diagram)
+        return '\n'.join(diagram)
+
+    def write_diagram(self, diagram):
+        self.render_diagram(diagram, self.place_tables())
+
+    def place_tables(self):
+        # models filled without a layer or build_model get their graph here
+        if self.graph is None:
+            self.build_graph()
+
+        self.apply_focus()
+
+        if self.previous_diagram:
+            self.add_previous_tables()
+
+        sorted_tables = sorted(self.tables, key=lambda table: table.get_priority())
+
+        if self.split_components:
+            placed = self.place_components(sorted_tables)
+        else:
+            placed = self.get_layout().place(sorted_tables, self.x, self.column_offset)
+
+        if self.previous_diagram:
+            # tables are rendered in a stable order, so unchanged tables keep their place in the file
+            placed = self.tables
+
+        return placed
+
+    def render_diagram(self, diagram, placed, connections=None, layers=None):
+        self.set_edge_routes(placed)
+        diagram.append("""<mxGraphModel><root><mxCell id="0"/>""")
+
+        for id, layer in enumerate(self.layers):
+            if layers is None or self.layers[layer] in layers:
+                diagram.append(self.renderer.layer.render(self.layers[layer], layer))
+
+        for table in placed:
+            diagram.append(str(table))
+
+        for constraint in self.connections if connections is None else connections:
+            self.add_diagram_constraint(diagram, constraint)
+
+        diagram.append("""</root></mxGraphModel>""")
+
+    def get_pages(self):
+        sorted_tables = sorted(self.tables, key=lambda table: table.get_priority())
+
+        if self.page_mode == 'schema':
+            schemas = collections.OrderedDict()
+            for table in sorted(sorted_tables, key=lambda table: table.get_schema()):
+                schemas.setdefault(table.get_schema(), []).append(table)
+
+            return [(schema, make_id('page', schema), tables) for schema, tables in schemas.items()]
+
+        # one page per FK component, small components share pages of up to page_tables tables
+        pages = []
+        shared = []
+        for component in sorted(self.get_components(sorted_tables), key=lambda component: -len(component)):
+            if shared and len(shared) + len(component) > self.page_tables:
+                pages.append(shared)
+                shared = []
+
+            if len(component) >= self.page_tables:
+                pages.append(component)
+            else:
+                shared.extend(component)
+
+        if shared:
+            pages.append(shared)
+
+        result = []
+        for tables in pages:
+            first = tables[0]
+            name = f'{first.get_schema()}.{first.get_name()}'
+            if len(tables) > 1:
+                name = f'{name} (+{len(tables) - 1})'
+
+            result.append((name, make_id('page', first.get_schema(), first.get_name()), tables))
+
+        return result
+
+    def set_pages(self):
+        if self.graph is None:
+            self.build_graph()
+
+        self.apply_focus()
+        self.page_list = []
+
+        table_pages = {}
+        for index, (name, page_id, tables) in enumerate(self.get_pages()):
+            self.page_list.append({'name': name, 'id': page_id, 'tables': tables, 'connections': [], 'links': []})
+            for table in tables:
+                table_pages[table] = index
+
+        for connection in self.connections:
+            source = connection['source']
+            source_table = self.find_table(source.table.schema, source.table.name)
+            target_table = self.find_table(connection['target'].table.schema, connection['target'].table.name)
+            if not source_table or not target_table:
+                continue
+
+            page = self.page_list[table_pages[source_table]]
+            if table_pages[source_table] == table_pages[target_table]:
+                page['connections'].append(connection)
+            else:
+                page['links'].append((connection, source_table, source.name, target_table, self.page_list[table_pages[target_table]]['id']))
+
+        # every page is laid out on its own canvas
+        for table in self.tables:
+            page = table_pages[table]
+            table.set_childs([x for x in table.get_childs() if table_pages.get(x) == page])
+            table.set_parents([x for x in table.get_parents() if table_pages.get(x) == page])
+
+        if self.previous_diagram:
+            self.add_previous_tables()
+
+    def write_pages(self, stream, compressed):
+        self.set_pages()
+        self.render_pages(stream, compressed)
+
+    def render_pages(self, stream, compressed):
+        stream.write("""<mxfile host="db-diagram">""")
+
+        if len(self.page_list) > 1 and len(self.tables) >= self.parallel_threshold and self.workers != 1 and can_fork():
+            # forked workers inherit the structure through the initializer, only page numbers and rendered pages are passed
+            with concurrent.futures.ProcessPoolExecutor(self.workers or None, mp_context=multiprocessing.get_context('fork'), initializer=set_page_structure, initargs=(self,)) as executor:
+                for page in executor.map(render_structure_page, range(len(self.page_list)), itertools.repeat(compressed)):
+                    stream.write(page)
+        else:
+            for index in range(len(self.page_list)):
+                stream.write(self.render_page(index, compressed))
+
+        stream.write("""</mxfile>""")
+
+    def render_page(self, index, compressed):
+        page = self.page_list[index]
+        tables = page['tables']
+
+        sorted_tables = sorted(tables, key=lambda table: table.get_priority())
+        if self.split_components:
+            placed = self.place_components(sorted_tables)
+        else:
+            placed = self.get_layout().place(sorted_tables, self.x, self.column_offset)
+
+        if self.previous_diagram:
+            placed = tables
+
+        layers = set(table.parent_id for table in tables)
+        layers.update(connection['parent_id'] for connection in page['connections'])
+        layers.update(link[0]['parent_id'] for link in page['links'])
+
+        stream = io.StringIO()
+        if compressed:
+            diagram = CompressedDiagramWriter(stream, page['name'], page['id'], False)
+        else:
+            diagram = DiagramPageWriter(stream, page['name'], page['id'])
+
+        diagram.append("""<mxGraphModel><root><mxCell id="0"/>""")
+        for name, layer_id in self.layers.items():
+            if layer_id in layers:
+                diagram.append(self.renderer.layer.render(layer_id, name))
+
+        for table in placed:
+            diagram.append(str(table))
+
+        self.set_edge_routes(placed)
+        for constraint in page['connections']:
+            self.add_diagram_constraint(diagram, constraint)
+
+        self.add_page_links(diagram, page['links'])
+
+        diagram.append("""</root></mxGraphModel>""")
+        diagram.close()
+        return stream.getvalue()
+
+    def add_page_links(self, diagram, links):
+        # one stub per referencing table and target table, next to the first FK column
+        stubs = {}
+        rows = collections.defaultdict(set)
+        offset_x = self.settings.table_width + 20
+        if self.add_comment:
+            offset_x = offset_x + self.settings.comment_width + 40
+
+        for connection, table, column_name, target_table, page_id in links:
+            key = (table, target_table)
+            if key not in stubs:
+                row = table.get_column_names().index(column_name)
+                while row in rows[table]:
+                    row = row + 1
+
+                rows[table].add(row)
+                stubs[key] = (make_id('link', table.get_schema(), table.get_name(), target_table.get_schema(), target_table.get_name()), row)
+                label = f'\u2192 {target_table.get_schema()}.{target_table.get_name()}'
+                diagram.append(self.renderer.page_link.render(connection['parent_id'], stubs[key][0], label, page_id, table.x + offset_x, table.y + (row + 1) * 26 + 3))
+
+            stub_id, stub_row = stubs[key]
+            if self.edge_waypoints:
+                points = self.get_link_route(connection, table, table.x + offset_x, stub_row)
+                diagram.append(self.renderer.constraint.render_points(connection['parent_id'], connection['id'], connection['source'].id, stub_id, 0, 1, points))
+            else:
+                diagram.append(self.renderer.constraint.render(connection['parent_id'], connection['id'], connection['source'].id, stub_id, 0, 1))
+
+    def get_counts(self):
+        return {
+            'tables': len(self.tables),
+            'columns': self.column_count,
+            'edges': len(self.connections)
+        }
+
+    def get_layout(self):
+        if self.layout == 'layered':
+            return LayeredLayout(self.get_column_width(), self.column_center, self.layered_max_height, self.layered_iterations, self.layered_ordering, self.column_max_height)
+
+        return ColumnLayout(self.get_column_width(), self.column_center, self.column_max_height, self.change_placement_direction, self.child_offset_fix, self.child_priority_fix, self.parent_priority_fix)
+
+    def get_components(self, sorted_tables):
+        component_index = {}
+        components = []
+
+        for table in sorted_tables:
+            if table in component_index or table.get_used_in_diagram():
+                continue
+
+            index = len(components)
+            components.append([])
+            component_index[table] = index
+            queue = [table]
+            for current in queue:
+                for linked in itertools.chain(current.get_childs(), current.get_parents()):
+                    if linked not in component_index and not linked.get_used_in_diagram():
+                        component_index[linked] = index
+                        queue.append(linked)
+
+        for table in sorted_tables:
+            if table in component_index:
+                components[component_index[table]].append(table)
+
+        return components
+
+    def place_components(self, sorted_tables):
+        components = self.get_components(sorted_tables)
+
+        # standalone tables are placed together in blocks, so packing can still shape the canvas
+        groups = [component for component in components if len(component) > 1]
+        singles = [component[0] for component in components if len(component) == 1]
+        for i in range(0, len(singles), self.singles_per_block):
+            groups.append(singles[i:i + self.singles_per_block])
+
+        layout = self.get_layout()
+
+        if len(sorted_tables) >= self.parallel_threshold and len(groups) > 1 and self.workers != 1 and can_fork():
+            specs = [get_component_spec(component) for component in groups]
+            with concurrent.futures.ProcessPoolExecutor(self.workers or None, mp_context=multiprocessing.get_context('fork')) as executor:
+                results = executor.map(layout_component, itertools.repeat(layout), specs, chunksize=max(1, len(specs) // 64))
+                for component, positions in zip(groups, results):
+                    for table, (x, y, column) in zip(component, positions):
+                        table.set_used_in_diagram()
+                        table.set_position(x, y)
+                        table.set_column(column)
+        else:
+            for component in groups:
+                layout.place(component, 0, 0)
+
+        return self.pack_components(groups)
+
+    def pack_components(self, components):
+        column_width = self.get_column_width()
+        boxes = []
+        area = 0
+
+        for tables in components:
+            min_column = min([table.get_column() for table in tables])
+            max_column = max([table.get_column() for table in tables])
+            min_y = min([table.y for table in tables])
+            max_y = max([table.y + (table.get_column_counts() * 26) + 78 for table in tables])
+            boxes.append((max_y - min_y, max_column - min_column + 1, min_column, min_y, tables))
+            area = area + (max_y - min_y) * (max_column - min_column + 1) * column_width
+
+        if not boxes:
+            return []
+
+        # shelf packing of component bounding boxes, tallest first, into a roughly square canvas
+        row_columns = max(max([box[1] for box in boxes]), int(math.sqrt(area) / column_width) + 1)
+        boxes.sort(key=lambda box: -box[0])
+
+        placed = []
+        column = 0
+        y = self.y
+        shelf_height = 0
+
+        for height, width, min_column, min_y, tables in boxes:
+            if column and column + width > row_columns:
+                column = 0
+                y = y + shelf_height
+                shelf_height = 0
+
+            for table in tables:
+                table_column = self.column_offset + column + table.get_column() - min_column
+                table.set_position(self.x + table_column * column_width, y + table.y - min_y)
+                table.set_column(table_column)
+                placed.append(table)
+
+            column = column + width
+            shelf_height = max(shelf_height, height)
+
+        return placed
+
+
+def can_fork():
+    # forking is only safe while no other thread runs (the HTTP server renders in threads)
+    return 'fork' in multiprocessing.get_all_start_methods() and threading.active_count() == 1
+
+
+page_structure = None
+
+
+def set_page_structure(structure):
+    # runs once in every forked worker, each worker renders pages of one structure only
+    global page_structure
+    page_structure = structure
+    page_structure.parallel_threshold = math.inf
+
+
+def render_structure_page(index, compressed):
+    # nested component pools are not started in workers, see set_page_structure
+    return page_structure.render_page(index, compressed)
@@ -0,0 +1,161 @@
+import io
+import os
+import re
+import zlib
+import contextlib
+import base64
+import urllib.parse
+import xml.etree.ElementTree
+
+
+id_safe_pattern = re.compile('[A-Za-z0-9_~-]*')
+
+
+def escape_value(value):
+    value = str(value)
+    if not ('&' in value or '<' in value or '>' in value or '"' in value):
+        return value
+
+    return value.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;').replace('"', '&quot;')
+
+
+@contextlib.contextmanager
+def atomic_output(path, mode='w'):
+    # written next to the target and moved over it when complete; on errors (also in abandoned
+    # generators) the previous file stays untouched and no partial file is left behind
+    temp_path = f'{path}.{os.getpid()}.tmp'
+    try:
+        with open(temp_path, mode, encoding=None if 'b' in mode else 'utf-8') as f:
+            yield f
+
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def make_id(kind, *names):
+    return ':'.join([kind, '.'.join([quote_id(name) for name in names])])
+
+
+def quote_id(name):
+    name = str(name)
+    if id_safe_pattern.fullmatch(name):
+        return name
+
+    return urllib.parse.quote(name, safe='').replace('.', '%2E')
+
+
+class DiagramWriter:
+    def __init__(self, stream):
+        self.stream = stream
+
+    def append(self, fragment):
+        self.stream.write(fragment)
+        self.stream.write('\n')
+
+    def close(self):
+        pass
+
+
+class DiagramPageWriter(DiagramWriter):
+    # uncompressed page of a multi-page mxfile
+    def __init__(self, stream, name, id):
+        super().__init__(stream)
+        self.stream.write(f"""<diagram id="{id}" name="{escape_value(name)}">\n""")
+
+    def close(self):
+        self.stream.write("""</diagram>""")
+
+
+class CompressedDiagramWriter:
+    # draw.io page format: base64(raw deflate(encodeURIComponent(xml)))
+    def __init__(self, stream, name = 'Page-1', id = None, standalone = True):
+        self.stream = stream
+        self.standalone = standalone
+        self.compressor = zlib.compressobj(9, zlib.DEFLATED, -15)
+        self.pending = b''
+        if standalone:
+            self.stream.write("""<mxfile host="db-diagram">""")
+
+        self.stream.write(f"""<diagram id="{id or make_id('page', name)}" name="{escape_value(name)}">""")
+
+    def append(self, fragment):
+        self.write_bytes(self.compressor.compress(urllib.parse.quote(fragment + '\n', safe="-_.!~*'()").encode('ascii')))
+
+    def write_bytes(self, data):
+        data = self.pending + data
+        size = len(data) - len(data) % 3
+        self.pending = data[size:]
+        if size:
+            self.stream.write(base64.b64encode(data[:size]).decode('ascii'))
+
+    def close(self):
+        self.write_bytes(self.compressor.flush())
+        if self.pending:
+            self.stream.write(base64.b64encode(self.pending).decode('ascii'))
+            self.pending = b''
+
+        self.stream.write("""</diagram>""")
+        if self.standalone:
+            self.stream.write("""</mxfile>""")
+
+
+class PreviousDiagram:
+    def __init__(self):
+        self.tables = {}
+
+    def load(self, path):
+        cells = {}
+        self.load_cells(path, cells)
+
+        for id, cell in cells.items():
+            if cell['style'].startswith('swimlane'):
+                position = cell
+                parent = cells.get(cell['parent'])
+                if parent and parent['style'] == 'group':
+                    position = parent
+
+                self.tables[id] = {
+                    'x': position['x'],
+                    'y': position['y'],
+                    'columns': []
+                }
+
+        for id, cell in cells.items():
+            if cell['parent'] in self.tables and not cell['style'].startswith('swimlane'):
+                self.tables[cell['parent']]['columns'].append(id)
+
+        return self
+
+    def load_cells(self, source, cells):
+        for event, element in xml.etree.ElementTree.iterparse(source):
+            if element.tag == 'diagram' and element.text and element.text.strip():
+                data = zlib.decompress(base64.b64decode(element.text.strip()), -15).decode('ascii')
+                self.load_cells(io.StringIO(urllib.parse.unquote(data)), cells)
+
+            if element.tag != 'mxCell':
+                continue
+
+            geometry = element.find('mxGeometry')
+            cells[element.get('id')] = {
+                'parent': element.get('parent'),
+                'style': element.get('style') or '',
+                'x': self.get_number(geometry, 'x'),
+                'y': self.get_number(geometry, 'y')
+            }
+            element.clear()
+
+    def get_number(self, geometry, key):
+        if geometry is None:
+            return 0
+
+        number = float(geometry.get(key, 0))
+        if number.is_integer():
+            return int(number)
+
+        return number
+
+    def get_table(self, id):
+        return self.tables.get(id)
@@ -0,0 +1,39 @@
+import re
+import sqlite3
+import contextlib
+
+import pytest
+
+from db_diagram.config import DiagramError
+from db_diagram.snapshot import DescriptionStore
+
+
+def test_description_store_merge_keeps_existing(tmp_path):
+    store = DescriptionStore(str(tmp_path / 'descriptions.sqlite'))
+
+    assert store.merge([('public', 'customer', 'id', 'Customer key'), ('audit', 'log', 'id', None)]) == 2
+    assert store.merge([('public', 'customer', 'id', 'Changed'), ('public', 'customer', 'name', 'Full name')]) == 1
+
+    table_filter = re.compile('^cust').match
+    assert store.load(['public'], lambda name: bool(table_filter(name))) == {
+        'public.customer.id': 'Customer key',
+        'public.customer.name': 'Full name'
+    }
+
+
+def test_description_store_without_table(tmp_path):
+    path = str(tmp_path / 'other.sqlite')
+    with contextlib.closing(sqlite3.connect(path)) as connection:
+        connection.execute('CREATE TABLE notes (id INTEGER)')
+
+    assert DescriptionStore(path).load(['public'], lambda name: True) == {}
+    assert DescriptionStore(str(tmp_path / 'missing.sqlite')).load(['public'], lambda name: True) == {}
+
+
+def test_description_store_not_a_database(tmp_path):
+    path = tmp_path / 'broken.sqlite'
+    path.write_text('not a database ' * 100)
+
+    with pytest.raises(DiagramError):
+        DescriptionStore(str(path)).load(['public'], lambda name: True)
+
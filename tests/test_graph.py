@@ -0,0 +1,69 @@
+from db_diagram.api import build_model
+from db_diagram.config import ExtConfig
+from db_diagram.structure import DBStructure
+
+
+config = {'structure': {'schema': 'public'}}
+
+columns = [
+    ('public', 'author', 'id', 'int4', 1, None),
+    ('public', 'author', 'favorite_book_id', 'int4', 2, None),
+    ('public', 'book', 'id', 'int4', 1, None),
+    ('public', 'book', 'author_id', 'int4', 2, None),
+    ('public', 'book', 'editor_id', 'int4', 3, None),
+    ('public', 'review', 'id', 'int4', 1, None),
+    ('public', 'review', 'book_id', 'int4', 2, None),
+    ('public', 'review', 'parent_id', 'int4', 3, None)
+]
+
+constraints = [
+    ('PRIMARY KEY', 'public', 'author_pkey', 'author', 'id', 'public', 'author', 'id'),
+    ('PRIMARY KEY', 'public', 'book_pkey', 'book', 'id', 'public', 'book', 'id'),
+    ('FOREIGN KEY', 'public', 'author_favorite_book_fkey', 'author', 'favorite_book_id', 'public', 'book', 'id'),
+    ('FOREIGN KEY', 'public', 'book_author_fkey', 'book', 'author_id', 'public', 'author', 'id'),
+    ('FOREIGN KEY', 'public', 'book_editor_fkey', 'book', 'editor_id', 'public', 'author', 'id'),
+    ('FOREIGN KEY', 'public', 'review_book_fkey', 'review', 'book_id', 'public', 'book', 'id'),
+    ('FOREIGN KEY', 'public', 'review_parent_fkey', 'review', 'parent_id', 'public', 'review', 'id')
+]
+
+
+def get_tables(model):
+    return [model.find_table('public', name) for name in ['author', 'book', 'review']]
+
+
+def test_parallel_edges_are_counted():
+    model = build_model(config, {'columns': columns, 'constraints': constraints})
+    graph = model.get_graph()
+    author, book, review = get_tables(model)
+
+    assert graph.get_childs(author) == [book]
+    assert graph.get_multiplicity(author, book) == 2
+    assert graph.get_multiplicity(book, author) == 1
+    assert graph.get_multiplicity(review, review) == 1
+    assert graph.get_multiplicity(review, book) == 0
+    assert graph.get_in_degree(author) == 1 and graph.get_out_degree(book) == 1
+
+
+def test_condensation():
+    model = build_model(config, {'columns': columns, 'constraints': constraints})
+    graph = model.get_graph()
+    author, book, review = get_tables(model)
+
+    # author and book reference each other, the self reference of review stays inside its component
+    assert graph.get_component(author) == graph.get_component(book)
+    assert graph.get_component(review) != graph.get_component(book)
+    assert graph.get_condensation() == {(graph.get_component(book), graph.get_component(review)): 1}
+
+
+def test_place_builds_graph():
+    model = DBStructure(ExtConfig(config))
+    for entry in columns:
+        model.add_table_entry(entry)
+
+    for entry in constraints:
+        model.add_constraint(entry)
+
+    model.place_tables()
+    author, book, review = get_tables(model)
+    assert model.get_graph() is not None
+    assert author.get_childs() == [book] and review.get_parents() == [book, review]
@@ -0,0 +1,143 @@
+import io
+
+import pytest
+
+from db_diagram.pgdump import PgDumpReader
+
+
+dump = """--
+-- PostgreSQL database dump
+--
+
+SET statement_timeout = 0;
+
+CREATE DOMAIN public.email AS character varying(200) NOT NULL CHECK (VALUE ~ '@');
+
+CREATE FUNCTION public.touch() RETURNS trigger
+    LANGUAGE plpgsql
+    AS $$
+BEGIN
+    -- CREATE TABLE public.fake (id integer);
+    NEW.updated := now();
+    RETURN NEW;
+END;
+$$;
+
+CREATE TABLE public.customer (
+    id integer NOT NULL,
+    email public.email,
+    tags text[],
+    aliases public.email[],
+    "Display Name" character varying(100) DEFAULT 'a, b'::character varying,
+    created timestamp with time zone DEFAULT now()
+);
+
+CREATE TABLE "Sales"."Order Line" (
+    order_id bigint NOT NULL,
+    line_no smallint NOT NULL,
+    customer_id integer,
+    amounts numeric(10,2)[],
+    CONSTRAINT order_line_check CHECK ((line_no > 0))
+);
+
+CREATE TABLE "Sales".shipment (
+    id integer NOT NULL,
+    order_id bigint,
+    line_no smallint
+);
+
+ALTER TABLE ONLY public.customer
+    ADD CONSTRAINT customer_pkey PRIMARY KEY (id);
+
+ALTER TABLE ONLY "Sales"."Order Line"
+    ADD CONSTRAINT "Order Line_pkey" PRIMARY KEY (order_id, line_no);
+
+ALTER TABLE ONLY "Sales"."Order Line"
+    ADD CONSTRAINT order_line_customer_fkey FOREIGN KEY (customer_id) REFERENCES public.customer(id);
+
+ALTER TABLE ONLY "Sales".shipment
+    ADD CONSTRAINT shipment_line_fkey FOREIGN KEY (order_id, line_no)
+    REFERENCES "Sales"."Order Line"(order_id, line_no) ON DELETE CASCADE;
+
+COMMENT ON COLUMN public.customer.email IS 'Customer''s address; used for invoices';
+
+COMMENT ON COLUMN "Sales"."Order Line".line_no IS 'Line
+number';
+"""
+
+
+def read_dump(text):
+    reader = PgDumpReader()
+    columns = list(reader.read(io.StringIO(text)))
+    return reader, columns
+
+
+@pytest.fixture
+def reader():
+    return read_dump(dump)[0]
+
+
+def test_columns():
+    reader, columns = read_dump(dump)
+    assert columns == [
+        ('public', 'customer', 'id', 'int4', 1, None),
+        ('public', 'customer', 'email', 'varchar', 2, None),
+        ('public', 'customer', 'tags', '_text', 3, None),
+        ('public', 'customer', 'aliases', '_varchar', 4, None),
+        ('public', 'customer', 'Display Name', 'varchar', 5, None),
+        ('public', 'customer', 'created', 'timestamptz', 6, None),
+        ('Sales', 'Order Line', 'order_id', 'int8', 1, None),
+        ('Sales', 'Order Line', 'line_no', 'int2', 2, None),
+        ('Sales', 'Order Line', 'customer_id', 'int4', 3, None),
+        ('Sales', 'Order Line', 'amounts', '_numeric', 4, None),
+        ('Sales', 'shipment', 'id', 'int4', 1, None),
+        ('Sales', 'shipment', 'order_id', 'int8', 2, None),
+        ('Sales', 'shipment', 'line_no', 'int2', 3, None)
+    ]
+
+
+def test_function_body_is_skipped():
+    # the CREATE TABLE inside the $$ body is not a table
+    reader, columns = read_dump(dump)
+    assert not [x for x in columns if x[1] == 'fake']
+
+
+def test_constraints(reader):
+    assert reader.constraints == [
+        ('PRIMARY KEY', 'public', 'customer_pkey', 'customer', 'id', 'public', 'customer', 'id'),
+        ('PRIMARY KEY', 'Sales', 'Order Line_pkey', 'Order Line', 'order_id', 'Sales', 'Order Line', 'order_id'),
+        ('PRIMARY KEY', 'Sales', 'Order Line_pkey', 'Order Line', 'line_no', 'Sales', 'Order Line', 'line_no'),
+        ('FOREIGN KEY', 'Sales', 'order_line_customer_fkey', 'Order Line', 'customer_id', 'public', 'customer', 'id'),
+        ('FOREIGN KEY', 'Sales', 'shipment_line_fkey', 'shipment', 'order_id', 'Sales', 'Order Line', 'order_id'),
+        ('FOREIGN KEY', 'Sales', 'shipment_line_fkey', 'shipment', 'line_no', 'Sales', 'Order Line', 'line_no')
+    ]
+
+
+def test_comments(reader):
+    assert reader.comments == {
+        ('public', 'customer', 'email'): "Customer's address; used for invoices",
+        ('Sales', 'Order Line', 'line_no'): 'Line\nnumber'
+    }
+
+
+def test_foreign_key_to_primary_key():
+    # REFERENCES without columns uses the primary key read before
+    reader, columns = read_dump("""
+CREATE TABLE public.region (
+    country text,
+    code text,
+    PRIMARY KEY (country, code)
+);
+
+CREATE TABLE public.store (
+    id integer,
+    country text,
+    code text,
+    FOREIGN KEY (country, code) REFERENCES public.region
+);
+""")
+
+    assert [x[4:] for x in reader.constraints if x[0] == 'FOREIGN KEY'] == [
+        ('country', 'public', 'region', 'country'),
+        ('code', 'public', 'region', 'code')
+    ]
@@ -0,0 +1,107 @@
+import json
+import argparse
+import threading
+import http.client
+
+import pytest
+
+from db_diagram.server import LayerPool, make_server
+from db_diagram.snapshot import write_snapshot
+
+
+columns = [
+    ('public', 'customer', 'id', 'int4', 1, None),
+    ('public', 'customer', 'name', 'text', 2, None),
+    ('public', 'orders', 'id', 'int4', 1, None),
+    ('public', 'orders', 'customer_id', 'int4', 2, None)
+]
+
+constraints = [
+    ('PRIMARY KEY', 'public', 'customer_pkey', 'customer', 'id', 'public', 'customer', 'id'),
+    ('PRIMARY KEY', 'public', 'orders_pkey', 'orders', 'id', 'public', 'orders', 'id'),
+    ('FOREIGN KEY', 'public', 'orders_customer_fkey', 'orders', 'customer_id', 'public', 'customer', 'id')
+]
+
+
+@pytest.fixture
+def server(tmp_path):
+    snapshot = str(tmp_path / 'shop.jsonl')
+    write_snapshot(snapshot, {'columns': columns, 'constraints': constraints})
+
+    config = {
+        'structure': {'schema': 'public'},
+        'databases': [{'name': 'shop', 'type': 'snapshot', 'dsn': snapshot}]
+    }
+    httpd = make_server(argparse.Namespace(serve='127.0.0.1:0', verbose=False), config)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+
+    yield httpd.server_address[:2]
+
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def get(address, path, headers=None):
+    connection = http.client.HTTPConnection(*address, timeout=10)
+    try:
+        connection.request('GET', path, headers=headers or {})
+        response = connection.getresponse()
+        return response.status, dict(response.getheaders()), response.read()
+    finally:
+        connection.close()
+
+
+def test_diagram_is_cached(server):
+    status, headers, body = get(server, '/diagram/shop')
+    assert status == 200
+    assert headers['X-Cache'] == 'miss'
+    assert b'public.orders' in body and b'public.customer' in body
+
+    status, cached_headers, cached_body = get(server, '/diagram/shop')
+    assert status == 200
+    assert cached_headers['X-Cache'] == 'hit'
+    assert cached_headers['ETag'] == headers['ETag']
+    assert cached_body == body
+
+    status, headers, body = get(server, '/diagram/shop', {'If-None-Match': headers['ETag']})
+    assert status == 304
+    assert body == b''
+
+
+def test_other_parameters_are_cached_separately(server):
+    get(server, '/diagram/shop')
+
+    status, headers, body = get(server, '/diagram/shop?layout=layered')
+    assert status == 200
+    assert headers['X-Cache'] == 'miss'
+
+
+def test_unknown_database(server):
+    status, headers, body = get(server, '/diagram/nope')
+    assert status == 404
+    assert json.loads(body) == {'error': 'Unknown database "nope"'}
+
+
+def test_wrong_parameter(server):
+    status, headers, body = get(server, '/diagram/shop?layout=circle')
+    assert status == 400
+
+
+def test_failed_layer_wakes_waiting_request(tmp_path):
+    snapshot = str(tmp_path / 'shop.jsonl')
+    write_snapshot(snapshot, {'columns': columns, 'constraints': constraints})
+    pool = LayerPool({'database': {'type': 'snapshot', 'dsn': snapshot}, 'structure': {'schema': 'public'}}, 1)
+
+    layer = pool.acquire()
+    acquired = []
+    waiting = threading.Thread(target=lambda: acquired.append(pool.acquire()), daemon=True)
+    waiting.start()
+    waiting.join(0.2)
+    assert waiting.is_alive()
+
+    # the layer in use fails, its slot goes to the waiting request
+    pool.discard(layer)
+    waiting.join(10)
+    assert not waiting.is_alive()
+    assert len(acquired) == 1 and pool.created == 1
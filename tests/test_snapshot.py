@@ -0,0 +1,38 @@
+import pytest
+
+from db_diagram.config import DiagramError
+from db_diagram.snapshot import write_snapshot, read_snapshot
+
+
+columns = [
+    ('public', 'customer', 'id', 'int4', 1, None),
+    ('public', 'customer', 'name', 'text', 2, 'Full "name", unicode é')
+]
+
+constraints = [
+    ('PRIMARY KEY', 'public', 'customer_pkey', 'customer', 'id', 'public', 'customer', 'id')
+]
+
+
+@pytest.mark.parametrize('name', ['shop.jsonl', 'shop.msgpack'])
+def test_round_trip(tmp_path, name):
+    path = str(tmp_path / name)
+    write_snapshot(path, {'columns': columns, 'constraints': constraints})
+
+    assert list(read_snapshot(path, 'columns')) == columns
+    assert list(read_snapshot(path, 'constraints')) == constraints
+    assert list(tmp_path.iterdir()) == [tmp_path / name]
+
+
+@pytest.mark.parametrize('content', [b'{"format": "other"}\n', b'{not json\n', b'\xc1\xc1\xc1', b'plain text'])
+def test_not_a_snapshot(tmp_path, content):
+    path = tmp_path / 'broken.jsonl'
+    path.write_bytes(content)
+
+    with pytest.raises(DiagramError):
+        list(read_snapshot(str(path), 'columns'))
+
+
+def test_missing_file(tmp_path):
+    with pytest.raises(DiagramError):
+        list(read_snapshot(str(tmp_path / 'missing.jsonl'), 'columns'))
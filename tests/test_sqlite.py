@@ -0,0 +1,127 @@
+import sqlite3
+import contextlib
+
+import pytest
+
+from db_diagram.config import DiagramError
+from db_diagram.layers import get_layer
+
+
+schema = """
+    CREATE TABLE region (
+        country TEXT,
+        code TEXT,
+        name TEXT,
+        PRIMARY KEY (country, code)
+    );
+    CREATE TABLE employee (
+        id INTEGER PRIMARY KEY,
+        manager_id INT REFERENCES employee (id),
+        email TEXT UNIQUE
+    );
+    CREATE TABLE store (
+        id INTEGER PRIMARY KEY,
+        country TEXT,
+        code TEXT,
+        manager_id INT REFERENCES employee,
+        FOREIGN KEY (country, code) REFERENCES region (country, code)
+    );
+    CREATE TABLE audit_log (
+        id INTEGER PRIMARY KEY,
+        store_id INT REFERENCES store (id)
+    );
+    CREATE VIEW v_store AS SELECT id, code FROM store;
+"""
+
+
+@pytest.fixture
+def database(tmp_path):
+    path = str(tmp_path / 'shop.sqlite')
+    with contextlib.closing(sqlite3.connect(path)) as connection:
+        connection.executescript(schema)
+
+    return path
+
+
+def get_model(path, **structure):
+    structure.setdefault('schema', 'main')
+    layer = get_layer({'database': {'type': 'sqlite', 'dsn': path}, 'structure': structure})
+    try:
+        layer.get_table_structure()
+        layer.get_constraints()
+    finally:
+        layer.close()
+
+    return layer.get_model()
+
+
+def get_edges(model):
+    return sorted((c['source'].table.name, c['source'].name, c['target'].table.name, c['target'].name) for c in model.connections)
+
+
+def test_tables_and_columns(database):
+    model = get_model(database)
+
+    assert sorted(table.name for table in model.tables) == ['audit_log', 'employee', 'region', 'store', 'v_store']
+    assert model.find_table('main', 'store').get_column_names() == ['id', 'country', 'code', 'manager_id']
+    assert model.get_structure_entry('main', 'region', 'code').flags & 1
+    assert model.get_structure_entry('main', 'employee', 'email').flags & 4
+
+
+def test_composite_and_self_referencing_keys(database):
+    model = get_model(database)
+
+    assert get_edges(model) == [
+        ('audit_log', 'store_id', 'store', 'id'),
+        ('employee', 'manager_id', 'employee', 'id'),
+        ('store', 'code', 'region', 'code'),
+        ('store', 'country', 'region', 'country'),
+        ('store', 'manager_id', 'employee', 'id')
+    ]
+
+    # both columns of the composite key make one link, the self reference stays
+    graph = model.get_graph()
+    employee = model.find_table('main', 'employee')
+    store = model.find_table('main', 'store')
+    assert graph.get_childs(model.find_table('main', 'region')) == [store]
+    assert graph.get_parents(employee) == [employee]
+    assert sorted(table.name for table in store.get_parents()) == ['employee', 'region']
+    assert graph.get_component(employee) != graph.get_component(store)
+
+
+def test_table_filter(database):
+    model = get_model(database, table='store|region')
+
+    assert sorted(table.name for table in model.tables) == ['region', 'store']
+    assert get_edges(model) == [
+        ('store', 'code', 'region', 'code'),
+        ('store', 'country', 'region', 'country')
+    ]
+
+
+def test_focus(database):
+    model = get_model(database, focus='store', focusDepth=1, focusDirection='parents')
+    model.place_tables()
+    assert sorted(table.name for table in model.tables) == ['employee', 'region', 'store']
+
+
+def test_focus_not_found(database):
+    model = get_model(database, focus='main.stroe')
+    with pytest.raises(DiagramError, match='main.stroe'):
+        model.place_tables()
+
+
+def test_keys_without_columns_pass(database):
+    layer = get_layer({'database': {'type': 'sqlite', 'dsn': database}, 'structure': {'schema': 'main'}})
+    try:
+        # columns served from a cache, keys are read on their own
+        constraints = list(layer.read_constraints())
+
+        # one pass, key rows of the columns query are kept
+        columns = list(layer.read_table_structure())
+        assert list(layer.read_constraints()) == constraints
+    finally:
+        layer.close()
+
+    assert len(columns) == 14
+    assert [row[0] for row in constraints].count('FOREIGN KEY') == 5